@@ -1,25 +1,42 @@
 #analyze.py
+import time
+
+MODULE_LOAD_START = time.perf_counter()
+
 import asyncio
+import contextlib
 import json
 import os
 import sys
-from typing import Dict, List, Set
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from pathlib import Path
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 import argparse
 import logging
-import time
-from openai import AsyncClient
 
-from providers.openai_provider import OpenAIProvider
+# openai and pydantic are deliberately not imported here: the client is
+# built lazily, so runs answered entirely from the cache never load them
+from cache import VerdictCache, context_key, default_cache_path
+from heuristics import classify_file, priority_score
+from import_graph import build_import_graph, is_seed, propagate, propagated_verdicts, relevance_probability
+from providers.base import FileRelevance
+from providers.circuit_breaker import CircuitBreaker, CircuitOpenError
+from providers.client_pool import ClientPool, endpoint_specs
+from providers.openai_provider import FILE_EVALUATION_MODEL, OpenAIProvider, read_file_safely
 from providers.readme_analyzer import ReadmeAnalyzer
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+IMPORT_TIME = time.perf_counter() - MODULE_LOAD_START
+
 logger = logging.getLogger("Analyzer")
 
+def configure_logging() -> None:
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
 def get_default_ignore_patterns() -> Set[str]:
     """Get default patterns to ignore."""
     return {
@@ -54,24 +71,110 @@ def should_ignore_file(file_path: str, ignore_patterns: Set[str]) -> bool:
         for pattern in ignore_patterns
     )
 
+def walk_repository_files(repo_path: Path, ignore_patterns: Set[str]) -> Iterator[str]:
+    """Yield repository-relative paths of files not matched by ignore patterns.
+
+    Ignored directories are pruned rather than descended into.
+    """
+    for dirpath, dirnames, filenames in os.walk(repo_path):
+        relative_dir = os.path.relpath(dirpath, repo_path)
+        if relative_dir == ".":
+            relative_dir = ""
+        dirnames[:] = [
+            name for name in dirnames
+            if not should_ignore_file(os.path.join(relative_dir, name), ignore_patterns)
+        ]
+        for filename in filenames:
+            relative_path = os.path.join(relative_dir, filename)
+            if not should_ignore_file(relative_path, ignore_patterns):
+                yield relative_path
+
+def collect_repository_files(repo_path: Path, ignore_patterns: Set[str]) -> List[str]:
+    """Return repository-relative paths of all files not matched by ignore patterns."""
+    return list(walk_repository_files(repo_path, ignore_patterns))
+
+@dataclass
+class SharedResources:
+    """State shared by analyses of several repositories running in one process."""
+    client: ClientPool
+    # Bounds in-flight API calls across all repositories
+    api_slots: asyncio.Semaphore
+    circuit_breaker: Optional[CircuitBreaker] = None
+
+async def evaluate_adaptively(
+    ai_provider: OpenAIProvider,
+    file_path: str,
+    preview: Optional[str],
+    project_context: Dict,
+    threshold: float,
+    first_pass_lines: int,
+    confidence_margin: float
+) -> Tuple[FileRelevance, bool]:
+    """Evaluate a file on a short preview first, sending the full preview only when needed.
+
+    The second call is made only where more content could change the outcome:
+    when the first verdict's relevance probability lies within
+    confidence_margin below the lower of 0.5 and the threshold, and within
+    confidence_margin above the threshold. Confident negatives are never
+    escalated.
+    Returns the verdict and whether a second pass was made.
+    """
+    if preview is None:
+        return await ai_provider.evaluate_file_relevance(file_path, preview, project_context), False
+
+    lines = preview.splitlines(keepends=True)
+    if len(lines) <= first_pass_lines:
+        return await ai_provider.evaluate_file_relevance(file_path, preview, project_context), False
+
+    short_preview = "".join(lines[:first_pass_lines])
+    evaluation = await ai_provider.evaluate_file_relevance(file_path, short_preview, project_context)
+    probability = relevance_probability(evaluation)
+    if evaluation.error or not min(0.5, threshold) - confidence_margin < probability < threshold + confidence_margin:
+        return evaluation, False
+
+    logger.info(f"Relevance probability {probability:.2f} is borderline, re-evaluating {file_path} with the full preview")
+    return await ai_provider.evaluate_file_relevance(file_path, preview, project_context), True
+
 async def analyze_repository(
     repo_path: str,
     config: Dict,
-    api_key: str
+    api_key: Optional[str],
+    shared: Optional[SharedResources] = None
 ) -> Dict:
-    """Main repository analysis function."""
+    """Main repository analysis function.
+
+    Runs as a streaming pipeline: a walker feeds paths to a thread pool that
+    reads previews, which feeds a pool of evaluators. Stages are connected by
+    bounded queues, so memory stays flat however large the repository is, and
+    walking and reading overlap with the README analysis.
+    """
     start_time = time.time()
+    startup_time = time.perf_counter() - MODULE_LOAD_START
     logger.info(f"Starting analysis of repository: {repo_path}")
     logger.info(f"Configuration: {json.dumps(config, indent=2)}")
 
+    tasks: List[asyncio.Task] = []
+    reader_pool = ThreadPoolExecutor(
+        max_workers=config.get("readerThreads", 4),
+        thread_name_prefix="preview-reader"
+    )
     try:
-        # Initialize OpenAI client and analyzers
-        logger.info("Initializing OpenAI client and analyzers...")
-        client = AsyncClient(api_key=api_key)
+        # Initialize analyzers; the OpenAI client is created on the first API call
+        logger.info("Initializing analyzers...")
+        # Calls are spread over every configured key or endpoint
+        client = shared.client if shared else ClientPool.from_config(config, api_key)
+        api_slot = shared.api_slots if shared else contextlib.nullcontext()
         readme_analyzer = ReadmeAnalyzer(client)
-        ai_provider = OpenAIProvider(api_key)
+        circuit_breaker = shared.circuit_breaker if shared else None
+        if circuit_breaker is None and config.get("circuitBreaker", True):
+            circuit_breaker = CircuitBreaker.from_config(config)
+        ai_provider = OpenAIProvider(api_key, client=client, circuit_breaker=circuit_breaker)
+        cache = VerdictCache(
+            (config.get("cachePath") or default_cache_path(repo_path))
+            if config.get("cache", True) else None
+        )
 
-        # Load and analyze README
+        # Load README
         logger.info("Loading README file...")
         readme_content = readme_analyzer.load_readme(repo_path)
         if not readme_content:
@@ -82,65 +185,261 @@ async def analyze_repository(
                 "projectContext": {}
             }
 
-        # Analyze project context
+        # Only relevant paths are kept; everything else is reduced to counters
+        relevant_files: List[str] = []
+        counts = {"total": 0, "processed": 0, "binary": 0, "cached": 0, "heuristic": 0, "second_pass": 0, "api_calls": 0,
+                  "api_errors": 0, "degraded": 0, "propagated": 0, "graph_edges": 0, "errors": 0}
+
+        async def analyze_context() -> Dict:
+            cached_context = cache.get_readme(readme_content)
+            if cached_context is not None:
+                logger.info("Using cached README analysis")
+                return cached_context
+            errors_before = readme_analyzer.errors_encountered
+            async with api_slot:
+                counts["api_calls"] += 1
+                project_context = await readme_analyzer.analyze_readme(readme_content)
+            if readme_analyzer.errors_encountered == errors_before:
+                cache.put_readme(readme_content, project_context)
+            return project_context
+
+        # Analyze project context while the repository is walked and read
         logger.info("Analyzing README content...")
-        project_context = await readme_analyzer.analyze_readme(readme_content)
-        logger.info("README analysis complete")
-        logger.info(f"Project purpose: {project_context.get('main_purpose', '')[:100]}...")
+        context_task = asyncio.ensure_future(analyze_context())
+        tasks.append(context_task)
 
-        # Get all files in repository
         repo_path = Path(repo_path)
         logger.info("Scanning repository for files...")
         ignore_patterns = get_default_ignore_patterns()
-        
-        all_files = []
-        for file_path in repo_path.rglob("*"):
-            if file_path.is_file():
-                relative_path = str(file_path.relative_to(repo_path))
-                if not should_ignore_file(relative_path, ignore_patterns):
-                    all_files.append(relative_path)
-
-        logger.info(f"Found {len(all_files)} files in repository")
-
-        # Evaluate each file
-        relevant_files = []
         threshold = config.get("relevanceThreshold", 0.7)
         max_preview_lines = config.get("maxPreviewLines", 50)
-        files_processed = 0
-        binary_files = 0
-        errors = 0
+        adaptive_preview = config.get("adaptivePreview", False)
+        first_pass_lines = config.get("firstPassLines", 10)
+        confidence_margin = config.get("confidenceMargin", 0.15)
+        queue_size = config.get("queueSize", 256)
+        reader_count = config.get("readerThreads", 4)
+        evaluator_count = config.get("maxConcurrency", 8)
+        loop = asyncio.get_running_loop()
 
-        logger.info(f"Starting file analysis with threshold: {threshold}")
-        for file_path in all_files:
-            files_processed += 1
-            full_path = repo_path / file_path
-            logger.info(f"Processing file [{files_processed}/{len(all_files)}]: {file_path}")
-            
+        # With a deadline, API calls stop once the budget is spent and the
+        # remaining files are classified locally; files are then ordered by
+        # expected importance so the budget goes to the most valuable ones
+        deadline_seconds = config.get("deadlineSeconds")
+        deadline = loop.time() + deadline_seconds if deadline_seconds else None
+        prioritize = config.get("priorityOrder", deadline is not None)
+
+        # With the import graph, only seed files (entry points and important
+        # paths) go to the model first; their verdicts spread along import
+        # edges and only files left ambiguous are sent to the model after them
+        use_graph = config.get("importGraph", False)
+        seeds: Set[str] = set()
+        seed_scores: Dict[str, float] = {}
+        seeds_done = asyncio.Event()
+        propagated: Dict[str, FileRelevance] = {}
+
+        def time_left() -> Optional[float]:
+            return None if deadline is None else max(0.0, deadline - loop.time())
+
+        async def wait_for_context() -> Dict:
             try:
-                # Evaluate relevance
-                evaluation = await ai_provider.evaluate_file_relevance(
-                    str(full_path), 
-                    file_path,
-                    project_context
+                return await asyncio.wait_for(asyncio.shield(context_task), time_left())
+            except asyncio.TimeoutError:
+                logger.warning("Deadline reached before README analysis finished")
+                return {}
+
+        path_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        preview_queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+        async def walk() -> None:
+            files = walk_repository_files(repo_path, ignore_patterns)
+            next_batch = lambda: list(islice(files, 256))
+            # Ordering needs every path up front; only the path strings are held
+            pending: List[str] = []
+            while True:
+                batch = await loop.run_in_executor(reader_pool, next_batch)
+                if not batch:
+                    break
+                for relative_path in batch:
+                    counts["total"] += 1
+                    if prioritize or use_graph:
+                        pending.append(relative_path)
+                    else:
+                        await path_queue.put(relative_path)
+
+            if not (prioritize or use_graph):
+                return
+            project_context = await wait_for_context()
+            if prioritize:
+                pending.sort(key=lambda path: priority_score(path, project_context), reverse=True)
+                logger.info(f"Evaluating {len(pending)} files in priority order")
+            if not use_graph:
+                for relative_path in pending:
+                    await path_queue.put(relative_path)
+                return
+
+            neighbours = await loop.run_in_executor(
+                reader_pool, build_import_graph, repo_path, pending, config.get("importScanLines", 200)
+            )
+            counts["graph_edges"] = sum(len(adjacent) for adjacent in neighbours.values()) // 2
+            held = [path for path in pending if path in neighbours and not is_seed(path, project_context)]
+            held_paths = set(held)
+            seeds.update(path for path in neighbours if path not in held_paths)
+            logger.info(f"Evaluating {len(seeds)} seed files before propagating along imports")
+            for relative_path in pending:
+                if relative_path not in held_paths:
+                    await path_queue.put(relative_path)
+
+            if seeds:
+                await seeds_done.wait()
+            scores = propagate(neighbours, seed_scores, config.get("importDecay", 0.7))
+            propagated.update(propagated_verdicts(scores, seed_scores, threshold))
+            logger.info(f"Propagation decided {len(propagated)} of {len(held)} connected files")
+            for relative_path in held:
+                await path_queue.put(relative_path)
+
+        async def read() -> None:
+            while True:
+                relative_path = await path_queue.get()
+                if relative_path is None:
+                    return
+                preview = await loop.run_in_executor(
+                    reader_pool,
+                    read_file_safely,
+                    str(repo_path / relative_path),
+                    max_preview_lines
                 )
+                await preview_queue.put((relative_path, preview))
+
+        async def call_model(file_path: str, preview: Optional[str], project_context: Dict) -> Tuple[FileRelevance, bool]:
+            async with api_slot:
+                if adaptive_preview:
+                    return await evaluate_adaptively(
+                        ai_provider,
+                        file_path,
+                        preview,
+                        project_context,
+                        threshold,
+                        first_pass_lines,
+                        confidence_margin
+                    )
+                return await ai_provider.evaluate_file_relevance(file_path, preview, project_context), False
+
+        async def evaluate() -> None:
+            project_context = await wait_for_context()
+            # Verdicts from any model the endpoints may answer with are reusable
+            verdict_contexts = {context_key(project_context, model) for model in ai_provider.evaluation_models()}
+            while True:
+                item = await preview_queue.get()
+                if item is None:
+                    return
+                file_path, preview = item
+                counts["processed"] += 1
+                logger.info(f"Processing file [{counts['processed']}/{counts['total']}]: {file_path}")
+                if preview is None:
+                    counts["binary"] += 1
 
-                if evaluation.is_relevant and evaluation.confidence >= threshold:
-                    relevant_files.append(file_path)
-                    logger.info(f"File marked as relevant: {file_path} (confidence: {evaluation.confidence:.2f})")
+                evaluation = None
+                try:
+                    if preview is not None:
+                        evaluation = cache.get(file_path, preview, verdict_contexts)
+                    if evaluation is not None:
+                        counts["cached"] += 1
+                    elif file_path in propagated:
+                        evaluation = propagated[file_path]
+                        counts["propagated"] += 1
+                    elif time_left() == 0:
+                        evaluation = classify_file(file_path, preview, project_context)
+                        if preview is not None:
+                            counts["heuristic"] += 1
+                    else:
+                        try:
+                            # Evaluate relevance
+                            evaluation, second_pass = await asyncio.wait_for(
+                                call_model(file_path, preview, project_context),
+                                time_left()
+                            )
+                            counts["second_pass"] += second_pass
+                            counts["api_calls"] += (preview is not None) + second_pass
+                        except asyncio.TimeoutError:
+                            evaluation = classify_file(file_path, preview, project_context)
+                            counts["heuristic"] += 1
+                        except CircuitOpenError:
+                            evaluation = classify_file(file_path, preview, project_context)
+                            counts["degraded"] += 1
+                        else:
+                            if evaluation.error:
+                                # A failed call is decided locally rather than dropped
+                                counts["api_errors"] += 1
+                                counts["degraded"] += 1
+                                evaluation = classify_file(file_path, preview, project_context)
+                            elif preview is not None:
+                                model = evaluation.model or FILE_EVALUATION_MODEL
+                                cache.put(file_path, preview, context_key(project_context, model), evaluation)
 
-            except Exception as e:
-                errors += 1
-                logger.error(f"Error processing {file_path}: {str(e)}", exc_info=True)
-                continue
+                    if evaluation.is_relevant and evaluation.confidence >= threshold:
+                        relevant_files.append(file_path)
+                        logger.info(f"File marked as relevant: {file_path} (confidence: {evaluation.confidence:.2f})")
+
+                except Exception as e:
+                    counts["errors"] += 1
+                    logger.error(f"Error processing {file_path}: {str(e)}", exc_info=True)
+
+                finally:
+                    if file_path in seeds:
+                        seed_scores[file_path] = relevance_probability(evaluation) if evaluation else 0.5
+                        if len(seed_scores) == len(seeds):
+                            seeds_done.set()
+
+        logger.info(f"Starting file analysis with threshold: {threshold}")
+        walker = asyncio.ensure_future(walk())
+        readers = [asyncio.ensure_future(read()) for _ in range(reader_count)]
+        evaluators = [asyncio.ensure_future(evaluate()) for _ in range(evaluator_count)]
+        tasks.extend([walker, *readers, *evaluators])
+
+        async def close_stages() -> None:
+            await walker
+            for _ in readers:
+                await path_queue.put(None)
+            await asyncio.gather(*readers)
+            for _ in evaluators:
+                await preview_queue.put(None)
+
+        # Awaiting the evaluators alongside the shutdown sequence surfaces a
+        # failure in any stage instead of leaving the others blocked on a queue
+        closer = asyncio.ensure_future(close_stages())
+        tasks.append(closer)
+        await asyncio.gather(closer, *evaluators)
+
+        project_context = context_task.result() if context_task.done() else {}
+        logger.info("README analysis complete")
+        logger.info(f"Project purpose: {project_context.get('main_purpose', '')[:100]}...")
+        logger.info(f"Found {counts['total']} files in repository")
+
+        cache.save()
 
         # Prepare final results
+        relevant_files.sort()
         elapsed_time = time.time() - start_time
         stats = {
-            "total_files": len(all_files),
-            "files_processed": files_processed,
-            "binary_files": binary_files,
-            "errors": errors,
+            "total_files": counts["total"],
+            "files_processed": counts["processed"],
+            "binary_files": counts["binary"],
+            "cached_files": counts["cached"],
+            "heuristic_files": counts["heuristic"],
+            "second_pass_files": counts["second_pass"],
+            "api_calls": counts["api_calls"],
+            "api_errors": counts["api_errors"],
+            "degraded_files": counts["degraded"],
+            "propagated_files": counts["propagated"],
+            "graph_edges": counts["graph_edges"],
+            "circuit_state": circuit_breaker.state if circuit_breaker else "disabled",
+            "deadline_reached": time_left() == 0,
+            "errors": counts["errors"],
             "relevant_files": len(relevant_files),
+            "import_time": f"{IMPORT_TIME:.3f}s",
+            "startup_time": f"{startup_time:.3f}s",
+            "client_init_time": f"{client.init_time:.3f}s" if client.initialized else "not needed",
+            "endpoints": client.get_statistics(),
             "processing_time": f"{elapsed_time:.2f}s"
         }
         
@@ -163,7 +462,13 @@ async def analyze_repository(
             "projectContext": {}
         }
 
+    finally:
+        for task in tasks:
+            task.cancel()
+        reader_pool.shutdown(wait=False, cancel_futures=True)
+
 async def main():
+    configure_logging()
     try:
         parser = argparse.ArgumentParser()
         parser.add_argument("repo_path", help="Path to repository")
@@ -175,11 +480,18 @@ async def main():
         
         # Get API key from environment
         api_key = os.getenv("OPENAI_API_KEY")
-        if not api_key:
-            raise ValueError("OPENAI_API_KEY environment variable not set")
 
-        # Run analysis
-        result = await analyze_repository(args.repo_path, config, api_key)
+        if config.get("query"):
+            # Rank against a task description with the embedding index; numpy
+            # is only imported for this mode
+            from embedding_index import query_repository
+            result = await query_repository(args.repo_path, config, api_key)
+        else:
+            # Fails early unless OPENAI_API_KEY, OPENAI_API_KEYS or apiEndpoints is set
+            endpoint_specs(config, api_key)
+
+            # Run analysis
+            result = await analyze_repository(args.repo_path, config, api_key)
         
         # Output results
         print(json.dumps(result))
@@ -0,0 +1,302 @@
+#batch.py
+import asyncio
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+from pathlib import Path
+import argparse
+import logging
+import time
+from openai import AsyncClient
+
+from analyze import configure_logging, get_default_ignore_patterns, walk_repository_files
+from cache import cache_directory, repository_digest
+from providers.openai_provider import (
+    FILE_EVALUATION_MODEL,
+    build_file_evaluation_messages,
+    parse_file_analysis,
+    read_file_safely
+)
+from providers.readme_analyzer import ReadmeAnalyzer
+
+logger = logging.getLogger("BatchAnalyzer")
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+# Provider limits per batch; the size limit is 200 MB, less headroom for the upload
+MAX_BATCH_REQUESTS = 50000
+MAX_BATCH_BYTES = 190 * 1024 * 1024
+
+def default_state_path(repo_path: str) -> str:
+    """Return the state file used for a repository when none is given."""
+    return os.path.join(cache_directory(), f"batch-state-{repository_digest(repo_path)}.json")
+
+def load_state(state_path: str) -> Dict:
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+def save_state(state_path: str, state: Dict) -> None:
+    """Write state atomically so an interrupted run never leaves it truncated."""
+    os.makedirs(os.path.dirname(os.path.abspath(state_path)), exist_ok=True)
+    temp_path = f"{state_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(temp_path, state_path)
+
+async def submit_requests(client: AsyncClient, requests_path: str, state: Dict, state_path: str) -> None:
+    """Upload one request file, create its batch and record it in the saved state."""
+    with open(requests_path, 'rb') as requests_file:
+        input_file = await client.files.create(file=requests_file, purpose="batch")
+    batch = await client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window="24h"
+    )
+    logger.info(f"Submitted batch {batch.id} (input file {input_file.id})")
+    state["batch_ids"].append(batch.id)
+    state["statuses"][batch.id] = batch.status
+    save_state(state_path, state)
+
+async def submit_batch(
+    client: AsyncClient,
+    repo_path: str,
+    config: Dict,
+    state_path: str
+) -> Dict:
+    """Write every per-file evaluation request to JSONL and submit it as one or more batches.
+
+    A batch is submitted as soon as it reaches the provider's request count
+    or input size limit (batchMaxRequests, batchMaxBytes), so repositories of
+    any size are split over as many batches as needed. Binary and unreadable
+    files are decided locally and never enter a batch. The state is saved
+    after each batch is created and marked submitted once all are.
+    """
+    readme_analyzer = ReadmeAnalyzer(client)
+    readme_content = readme_analyzer.load_readme(repo_path)
+    if not readme_content:
+        raise ValueError("README not found")
+    project_context = await readme_analyzer.analyze_readme(readme_content)
+
+    max_preview_lines = config.get("maxPreviewLines", 50)
+    max_requests = config.get("batchMaxRequests", MAX_BATCH_REQUESTS)
+    max_bytes = config.get("batchMaxBytes", MAX_BATCH_BYTES)
+    root = Path(repo_path)
+    state = {
+        "repo_path": str(root.resolve()),
+        "project_context": project_context,
+        "total_files": 0,
+        "binary_files": 0,
+        "batch_requests": 0,
+        "batch_ids": [],
+        "statuses": {},
+        "submitted": False
+    }
+
+    # The request file sits next to the state file and is streamed to disk
+    # so the number of files does not affect memory use
+    requests_path = f"{state_path}.requests.jsonl"
+    requests_file = open(requests_path, 'w', encoding='utf-8')
+    part_requests = part_bytes = 0
+    try:
+        for relative_path in walk_repository_files(root, get_default_ignore_patterns()):
+            state["total_files"] += 1
+            preview = read_file_safely(str(root / relative_path), max_preview_lines)
+            if preview is None:
+                state["binary_files"] += 1
+                continue
+            line = json.dumps({
+                "custom_id": relative_path,
+                "method": "POST",
+                "url": BATCH_ENDPOINT,
+                "body": {
+                    "model": FILE_EVALUATION_MODEL,
+                    "messages": build_file_evaluation_messages(relative_path, preview, project_context),
+                    "response_format": {"type": "json_object"}
+                }
+            }) + "\n"
+            line_bytes = len(line.encode('utf-8'))
+            if part_requests and (part_requests >= max_requests or part_bytes + line_bytes > max_bytes):
+                requests_file.close()
+                await submit_requests(client, requests_path, state, state_path)
+                requests_file = open(requests_path, 'w', encoding='utf-8')
+                part_requests = part_bytes = 0
+            requests_file.write(line)
+            part_requests += 1
+            part_bytes += line_bytes
+            state["batch_requests"] += 1
+
+        requests_file.close()
+        if part_requests:
+            await submit_requests(client, requests_path, state, state_path)
+    finally:
+        requests_file.close()
+        if os.path.exists(requests_path):
+            os.remove(requests_path)
+
+    logger.info(
+        f"Submitted {state['batch_requests']} requests for {state['total_files']} files "
+        f"in {len(state['batch_ids'])} batches"
+    )
+    state["submitted"] = True
+    save_state(state_path, state)
+    return state
+
+async def cancel_batches(client: AsyncClient, batch_ids: List[str]) -> None:
+    for batch_id in batch_ids:
+        try:
+            await client.batches.cancel(batch_id)
+        except Exception as e:
+            logger.warning(f"Could not cancel batch {batch_id}: {str(e)}")
+
+async def wait_for_batch(
+    client: AsyncClient,
+    batch_id: str,
+    state: Dict,
+    state_path: str,
+    poll_interval: float
+):
+    """Poll a submitted batch until it reaches a terminal status."""
+    while True:
+        batch = await client.batches.retrieve(batch_id)
+        if batch.status != state["statuses"].get(batch_id):
+            logger.info(f"Batch {batch.id} status: {batch.status}")
+            state["statuses"][batch_id] = batch.status
+            save_state(state_path, state)
+        if batch.status in TERMINAL_STATUSES:
+            return batch
+        await asyncio.sleep(poll_interval)
+
+async def collect_results(client: AsyncClient, batch, threshold: float) -> Dict:
+    """Map batch output lines back to FileRelevance verdicts."""
+    relevant_files = []
+    evaluated = 0
+    errors = 0
+
+    if batch.output_file_id:
+        output = await client.files.content(batch.output_file_id)
+        for line in output.text.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            file_path = record["custom_id"]
+            response = record.get("response") or {}
+            try:
+                if record.get("error") or response.get("status_code") != 200:
+                    raise ValueError(record.get("error") or f"status {response.get('status_code')}")
+                evaluation = parse_file_analysis(
+                    file_path,
+                    response["body"]["choices"][0]["message"]["content"]
+                )
+            except Exception as e:
+                errors += 1
+                logger.error(f"Error processing batch result for {file_path}: {str(e)}")
+                continue
+            evaluated += 1
+            if evaluation.is_relevant and evaluation.confidence >= threshold:
+                relevant_files.append(file_path)
+
+    if batch.error_file_id:
+        error_output = await client.files.content(batch.error_file_id)
+        errors += sum(1 for line in error_output.text.splitlines() if line.strip())
+
+    return {"relevant_files": sorted(relevant_files), "evaluated": evaluated, "errors": errors}
+
+async def analyze_repository_batch(
+    repo_path: str,
+    config: Dict,
+    client: AsyncClient,
+    state_path: Optional[str] = None
+) -> Dict:
+    """Analyze a repository through the Batch API, resuming from saved state if present."""
+    start_time = time.time()
+    state_path = state_path or default_state_path(repo_path)
+    threshold = config.get("relevanceThreshold", 0.7)
+    poll_interval = config.get("batchPollInterval", 30)
+
+    state = load_state(state_path)
+    if state.get("repo_path") != str(Path(repo_path).resolve()):
+        state = {}
+    if state.get("batch_ids") and not state.get("submitted"):
+        # The requests of an interrupted submission are not all in a batch
+        logger.warning(f"Cancelling {len(state['batch_ids'])} batches of an interrupted submission")
+        await cancel_batches(client, state["batch_ids"])
+        state = {}
+    if state.get("submitted"):
+        logger.info(f"Resuming {len(state['batch_ids'])} batches from {state_path}")
+    else:
+        state = await submit_batch(client, repo_path, config, state_path)
+
+    results = {"relevant_files": [], "evaluated": 0, "errors": 0}
+    for batch_id in state["batch_ids"]:
+        batch = await wait_for_batch(client, batch_id, state, state_path, poll_interval)
+        if batch.status in ("failed", "cancelled"):
+            raise RuntimeError(f"Batch {batch.id} {batch.status}")
+        batch_results = await collect_results(client, batch, threshold)
+        results["relevant_files"].extend(batch_results["relevant_files"])
+        results["evaluated"] += batch_results["evaluated"]
+        results["errors"] += batch_results["errors"]
+    results["relevant_files"].sort()
+    # Requests with no output line (e.g. an expired batch) are errors too
+    results["errors"] += max(
+        0, state["batch_requests"] - results["evaluated"] - results["errors"]
+    )
+
+    os.remove(state_path)
+    elapsed_time = time.time() - start_time
+    stats = {
+        "total_files": state["total_files"],
+        "binary_files": state["binary_files"],
+        "batch_requests": state["batch_requests"],
+        "batches": len(state["batch_ids"]),
+        "errors": results["errors"],
+        "relevant_files": len(results["relevant_files"]),
+        "processing_time": f"{elapsed_time:.2f}s"
+    }
+    logger.info("Batch analysis complete!")
+    for key, value in stats.items():
+        logger.info(f"- {key}: {value}")
+
+    return {
+        "relevantFiles": results["relevant_files"],
+        "projectContext": state["project_context"],
+        "statistics": stats
+    }
+
+async def main():
+    configure_logging()
+    try:
+        parser = argparse.ArgumentParser()
+        parser.add_argument("repo_path", help="Path to repository")
+        parser.add_argument("--config", help="Repopack configuration")
+        parser.add_argument("--state", help="Batch state file, reused to resume an interrupted run")
+        args = parser.parse_args()
+
+        config = json.loads(args.config) if args.config else {}
+
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY environment variable not set")
+
+        result = await analyze_repository_batch(
+            args.repo_path,
+            config,
+            AsyncClient(api_key=api_key),
+            args.state
+        )
+        print(json.dumps(result))
+
+    except Exception as e:
+        logger.error(f"Fatal error: {str(e)}", exc_info=True)
+        print(json.dumps({
+            "error": str(e),
+            "relevantFiles": [],
+            "projectContext": {}
+        }))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
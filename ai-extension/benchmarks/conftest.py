@@ -0,0 +1,68 @@
+"""Micro-benchmarks for the local (non-API) hot paths of the AI extension.
+
+Record a baseline, then compare later runs against it:
+
+    python -m pytest benchmarks --benchmark-autosave
+    python -m pytest benchmarks --benchmark-compare
+
+The benchmarks are not collected by a plain ``pytest`` run (see pytest.ini).
+
+When comparing, a benchmark whose mean is more than DEFAULT_TOLERANCE slower
+than the baseline fails the run, unless --benchmark-compare-fail is given.
+"""
+import os
+import random
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+from pytest_benchmark.utils import parse_compare_fail
+
+DEFAULT_TOLERANCE = "mean:20%"
+
+TREE_DEPTH = 12
+DIRS_PER_LEVEL = 3
+FILES_PER_DIR = 8
+HUGE_FILE_LINES = 200_000
+BLOB_SIZE = 1024 * 1024
+
+def pytest_sessionstart(session):
+    # pytest-benchmark creates its session in its own pytest_configure, which
+    # may run after this conftest's; by session start it always exists
+    session = getattr(session.config, "_benchmarksession", None)
+    if session is not None and session.compare and not session.compare_fail:
+        session.compare_fail = [parse_compare_fail(DEFAULT_TOLERANCE)]
+
+def build_synthetic_tree(root) -> None:
+    """Create a deep tree of small sources plus huge text files, binary blobs and ignored dirs."""
+    rng = random.Random(1234)
+    extensions = [".py", ".ts", ".md", ".json", ".txt", ".dat", ""]
+
+    (root / "README.md").write_text("# Synthetic\n" * 50)
+    frontier = [root]
+    for depth in range(TREE_DEPTH):
+        next_frontier = []
+        for directory in frontier:
+            for index in range(FILES_PER_DIR):
+                extension = rng.choice(extensions)
+                lines = "".join(f"line {n} of file {index} at depth {depth}\n" for n in range(rng.randint(5, 200)))
+                (directory / f"file_{index}{extension}").write_text(lines)
+            for index in range(DIRS_PER_LEVEL if depth < 4 else 1):
+                child = directory / f"pkg_{depth}_{index}"
+                child.mkdir()
+                next_frontier.append(child)
+        frontier = next_frontier
+
+    (root / "huge.py").write_text("x = 1\n" * HUGE_FILE_LINES)
+    (root / "huge_single_line.js").write_text("a" * BLOB_SIZE * 4)
+    (root / "blob.bin").write_bytes(os.urandom(BLOB_SIZE))
+    (root / "blob.unknown").write_bytes(os.urandom(BLOB_SIZE))
+    for ignored in ("node_modules/dep/lib", ".git/objects/ab", "build/out"):
+        (root / ignored).mkdir(parents=True)
+        for index in range(200):
+            (root / ignored / f"ignored_{index}.js").write_text("ignored\n")
+
+@pytest.fixture(scope="session")
+def synthetic_tree(tmp_path_factory):
+    root = tmp_path_factory.mktemp("synthetic_repo")
+    build_synthetic_tree(root)
+    return root
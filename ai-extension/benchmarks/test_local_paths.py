@@ -0,0 +1,63 @@
+import json
+import pytest
+from analyze import collect_repository_files, get_default_ignore_patterns, should_ignore_file
+from providers.openai_provider import (
+    FileAnalysis,
+    build_file_evaluation_messages,
+    is_definitely_binary,
+    is_known_text_file,
+    read_file_safely
+)
+from providers.readme_analyzer import ProjectContext
+
+PROJECT_CONTEXT = {
+    "main_purpose": "Pack a repository into a single AI-friendly file. " * 4,
+    "core_features": [f"feature {n}" for n in range(10)],
+    "key_components": [f"src/component_{n}.ts" for n in range(10)],
+    "tech_stack": ["TypeScript", "Python", "OpenAI"],
+    "file_patterns": ["*.ts", "*.py"],
+    "important_paths": [f"src/core/path_{n}" for n in range(10)]
+}
+
+@pytest.fixture(scope="module")
+def all_paths(synthetic_tree):
+    return collect_repository_files(synthetic_tree, set())
+
+def test_should_ignore_file(benchmark, all_paths):
+    patterns = get_default_ignore_patterns()
+    benchmark(lambda: [should_ignore_file(path, patterns) for path in all_paths])
+
+def test_walk_repository(benchmark, synthetic_tree):
+    files = benchmark(collect_repository_files, synthetic_tree, get_default_ignore_patterns())
+    assert not any(path.startswith("node_modules") for path in files)
+
+def test_extension_checks(benchmark, all_paths):
+    benchmark(lambda: [
+        is_known_text_file(path) or is_definitely_binary(path) for path in all_paths
+    ])
+
+def test_read_small_files(benchmark, synthetic_tree, all_paths):
+    sample = [str(synthetic_tree / path) for path in all_paths if path.startswith("pkg_0_0")][:200]
+    benchmark(lambda: [read_file_safely(path) for path in sample])
+
+def test_read_huge_file(benchmark, synthetic_tree):
+    preview = benchmark(read_file_safely, str(synthetic_tree / "huge.py"))
+    assert preview.count("\n") == 50
+
+def test_read_huge_single_line(benchmark, synthetic_tree):
+    benchmark(read_file_safely, str(synthetic_tree / "huge_single_line.js"))
+
+def test_read_binary_blob(benchmark, synthetic_tree):
+    assert benchmark(read_file_safely, str(synthetic_tree / "blob.unknown")) is None
+
+def test_prompt_assembly(benchmark, synthetic_tree):
+    preview = read_file_safely(str(synthetic_tree / "huge.py"))
+    benchmark(build_file_evaluation_messages, "huge.py", preview, PROJECT_CONTEXT)
+
+def test_validate_file_analysis(benchmark):
+    payload = json.dumps({"is_relevant": True, "confidence": 0.87, "reason": "Core module " * 20})
+    benchmark(FileAnalysis.model_validate_json, payload)
+
+def test_validate_project_context(benchmark):
+    payload = json.dumps(PROJECT_CONTEXT)
+    benchmark(ProjectContext.model_validate_json, payload)
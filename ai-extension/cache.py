@@ -0,0 +1,106 @@
+#cache.py
+import hashlib
+import json
+import os
+from typing import Collection, Dict, Optional
+from pathlib import Path
+import logging
+
+from providers.base import FileRelevance
+
+logger = logging.getLogger("VerdictCache")
+
+CACHE_VERSION = 1
+
+def repository_digest(repo_path: str) -> str:
+    """Short stable identifier of a repository, used to name its per-repository files."""
+    return hashlib.sha1(str(Path(repo_path).resolve()).encode()).hexdigest()[:12]
+
+def cache_directory() -> str:
+    cache_home = os.getenv("XDG_CACHE_HOME") or os.path.join(Path.home(), ".cache")
+    return os.path.join(cache_home, "repopack")
+
+def default_cache_path(repo_path: str) -> str:
+    """Return the per-repository cache file under the user cache directory."""
+    return os.path.join(cache_directory(), f"ai-verdicts-{repository_digest(repo_path)}.json")
+
+def content_hash(content: str) -> str:
+    return hashlib.sha1(content.encode('utf-8', 'surrogatepass')).hexdigest()
+
+def context_key(project_context: Dict, model: str) -> str:
+    """Identify the project context and model a verdict was made against."""
+    return content_hash(model + json.dumps(project_context, sort_keys=True))
+
+class VerdictCache:
+    """README analyses and per-file verdicts persisted between runs.
+
+    A file verdict is reused only while the file's preview and the project
+    context are unchanged and the model that made it may still answer. Each path keeps just its most
+    recent verdict, so the cache does not grow with every edit.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.readme: Dict[str, Dict] = {}
+        self.files: Dict[str, list] = {}
+        self.dirty = False
+        if path:
+            self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache {self.path}: {str(e)}")
+            return
+        if data.get("version") != CACHE_VERSION:
+            return
+        self.readme = data.get("readme", {})
+        self.files = data.get("files", {})
+
+    def get_readme(self, readme_content: str) -> Optional[Dict]:
+        return self.readme.get(content_hash(readme_content))
+
+    def put_readme(self, readme_content: str, project_context: Dict) -> None:
+        # Only the current README's analysis is worth keeping
+        self.readme = {content_hash(readme_content): project_context}
+        self.dirty = True
+
+    def get(self, relative_path: str, preview: str, contexts: Collection[str]) -> Optional[FileRelevance]:
+        """Return the verdict for this preview if it was made against one of contexts."""
+        entry = self.files.get(relative_path)
+        if entry is None or entry[0] != content_hash(preview) or entry[1] not in contexts:
+            return None
+        _, _, is_relevant, confidence, reason = entry
+        return FileRelevance(
+            path=relative_path,
+            is_relevant=is_relevant,
+            confidence=confidence,
+            reason=reason
+        )
+
+    def put(self, relative_path: str, preview: str, context: str, verdict: FileRelevance) -> None:
+        if verdict.error:
+            return
+        self.files[relative_path] = [
+            content_hash(preview),
+            context,
+            verdict.is_relevant,
+            verdict.confidence,
+            verdict.reason
+        ]
+        self.dirty = True
+
+    def save(self) -> None:
+        """Write the cache atomically if anything changed."""
+        if not self.path or not self.dirty:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": CACHE_VERSION, "readme": self.readme, "files": self.files}, f)
+        os.replace(temp_path, self.path)
+        self.dirty = False
@@ -0,0 +1,432 @@
+#embedding_index.py
+import asyncio
+import glob
+import json
+import math
+import os
+import re
+import sys
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple, Union
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import logging
+import time
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from analyze import configure_logging, get_default_ignore_patterns, walk_repository_files
+from cache import cache_directory, content_hash, repository_digest
+from providers.client_pool import ClientPool
+from providers.lazy_client import LazyAsyncClient
+from providers.openai_provider import read_file_safely
+
+logger = logging.getLogger("EmbeddingIndex")
+
+INDEX_VERSION = 1
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 512
+# Roughly 2k tokens; keeps a single input well inside the endpoint's limit
+MAX_EMBEDDING_CHARS = 8000
+
+TOKEN_PATTERN = re.compile(r"[A-Z]?[a-z]+|[A-Z]+(?![a-z])|\d+")
+
+STOP_WORDS = {
+    'the', 'and', 'for', 'with', 'this', 'that', 'from', 'import', 'return',
+    'self', 'def', 'class', 'function', 'const', 'let', 'var', 'if', 'else',
+    'is', 'in', 'to', 'of', 'or', 'not', 'none', 'null', 'true', 'false',
+    'new', 'pub', 'fn', 'func', 'use', 'export', 'default', 'async', 'await'
+}
+
+def default_index_path(repo_path: str, embedder_name: str) -> str:
+    """Return the per-repository index directory under the user cache directory."""
+    return os.path.join(cache_directory(), f"embeddings-{repository_digest(repo_path)}-{embedder_name}")
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lower-case words, breaking snake_case and camelCase identifiers."""
+    return [
+        token for token in (match.lower() for match in TOKEN_PATTERN.findall(text))
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+class HashedFeatureEmbedder:
+    """Local embeddings from hashed identifier tokens; needs no network or model.
+
+    Each token is hashed to a signed bucket and weighted by 1 + log(count).
+    Path tokens are weighted up, since a file's location says a lot about it.
+    """
+
+    def __init__(self, dimensions: int = EMBEDDING_DIMENSIONS, path_weight: float = 3.0):
+        self.dimensions = dimensions
+        self.path_weight = path_weight
+        self.name = f"hashed-{dimensions}"
+        self._buckets: Dict[str, Tuple[int, float]] = {}
+
+    def _bucket(self, token: str) -> Tuple[int, float]:
+        bucket = self._buckets.get(token)
+        if bucket is None:
+            # crc32 rather than hash(): the index must be stable across processes
+            digest = zlib.crc32(token.encode('utf-8'))
+            bucket = (digest % self.dimensions, 1.0 if digest & 0x80000000 else -1.0)
+            self._buckets[token] = bucket
+        return bucket
+
+    def embed_text(self, text: str, path: str = "") -> np.ndarray:
+        weights = Counter()
+        for token, count in Counter(tokenize(text)).items():
+            weights[token] += 1.0 + math.log(count)
+        for token in tokenize(path):
+            weights[token] += self.path_weight
+
+        vector = np.zeros(self.dimensions, dtype=np.float32)
+        if weights:
+            buckets = [self._bucket(token) for token in weights]
+            indices = np.fromiter((index for index, _ in buckets), dtype=np.int64, count=len(buckets))
+            values = np.fromiter(
+                (sign * weight for (_, sign), weight in zip(buckets, weights.values())),
+                dtype=np.float32,
+                count=len(buckets)
+            )
+            np.add.at(vector, indices, values)
+        return vector
+
+    async def embed(self, texts: List[str], paths: Optional[List[str]] = None) -> np.ndarray:
+        paths = paths or [""] * len(texts)
+        return np.stack([self.embed_text(text, path) for text, path in zip(texts, paths)])
+
+class EndpointEmbedder:
+    """Embeddings from an OpenAI-compatible /embeddings endpoint."""
+
+    def __init__(
+        self,
+        client: Union[LazyAsyncClient, ClientPool],
+        model: str = EMBEDDING_MODEL,
+        dimensions: int = EMBEDDING_DIMENSIONS,
+        batch_size: int = 64
+    ):
+        self.client = client
+        self.model = model
+        self.dimensions = dimensions
+        self.batch_size = batch_size
+        self.name = f"{model}-{dimensions}"
+
+    async def embed(self, texts: List[str], paths: Optional[List[str]] = None) -> np.ndarray:
+        if paths:
+            texts = [f"{path}\n{text}" for text, path in zip(texts, paths)]
+        vectors = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = [text[:MAX_EMBEDDING_CHARS] or " " for text in texts[start:start + self.batch_size]]
+            response = await self.client.embeddings.create(
+                model=self.model,
+                input=batch,
+                dimensions=self.dimensions
+            )
+            vectors.extend(item.embedding for item in response.data)
+        return np.asarray(vectors, dtype=np.float32).reshape(len(texts), self.dimensions)
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+class EmbeddingIndex:
+    """File embeddings persisted as a memory-mapped matrix keyed by content hash.
+
+    Each path maps to the hash of its embedded text plus the mtime and size it
+    was seen with, so unchanged files are not even re-read on update. Rows no
+    longer referenced by any path are dropped once they outnumber live rows;
+    compaction writes a new vectors file, which index.json only points to once
+    saved, so a crash in between leaves the previous index intact.
+    """
+
+    def __init__(self, index_dir: str, embedder_name: str, dimensions: int):
+        self.index_dir = index_dir
+        self.embedder_name = embedder_name
+        self.dimensions = dimensions
+        self.meta_path = os.path.join(index_dir, "index.json")
+        self.vectors_path = os.path.join(index_dir, "vectors.npy")
+        self.rows: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        # path -> [content hash, mtime_ns, size]
+        self.paths: Dict[str, list] = {}
+        self.vectors: Optional[np.memmap] = None
+        self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            if (meta.get("version") != INDEX_VERSION or meta.get("embedder") != self.embedder_name
+                    or meta.get("dimensions") != self.dimensions):
+                return
+            vectors_path = os.path.join(self.index_dir, os.path.basename(meta.get("vectors", "vectors.npy")))
+            vectors = np.load(vectors_path, mmap_mode='r+')
+            rows, paths = meta["rows"], meta["paths"]
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable embedding index {self.index_dir}: {str(e)}")
+            return
+        if vectors.ndim != 2 or vectors.shape[1] != self.dimensions or vectors.shape[0] < len(rows):
+            logger.warning(f"Ignoring embedding index with mismatched vectors: {self.index_dir}")
+            return
+        self.vectors = vectors
+        self.vectors_path = vectors_path
+        self.rows = rows
+        self.row_of = {digest: row for row, digest in enumerate(rows)}
+        self.paths = paths
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def _ensure_capacity(self, needed: int) -> None:
+        capacity = 0 if self.vectors is None else self.vectors.shape[0]
+        if needed <= capacity:
+            return
+        os.makedirs(self.index_dir, exist_ok=True)
+        temp_path = f"{self.vectors_path}.tmp.npy"
+        grown = open_memmap(
+            temp_path, mode='w+', dtype=np.float32, shape=(max(needed, 2 * capacity, 64), self.dimensions)
+        )
+        if self.rows:
+            grown[:len(self.rows)] = self.vectors[:len(self.rows)]
+        grown.flush()
+        del grown
+        self.vectors = None
+        os.replace(temp_path, self.vectors_path)
+        self.vectors = np.load(self.vectors_path, mmap_mode='r+')
+
+    def add(self, digests: List[str], vectors: np.ndarray) -> None:
+        """Append normalized vectors for content hashes not yet in the index."""
+        start = len(self.rows)
+        self._ensure_capacity(start + len(digests))
+        self.vectors[start:start + len(digests)] = normalize(vectors)
+        for offset, digest in enumerate(digests):
+            self.row_of[digest] = start + offset
+        self.rows.extend(digests)
+
+    def set_paths(self, paths: Dict[str, list]) -> None:
+        self.paths = paths
+        live = {entry[0] for entry in paths.values()}
+        if len(self.rows) - len(live) > len(live):
+            self._compact(live)
+
+    def _compact(self, live: set) -> None:
+        keep = [row for row, digest in enumerate(self.rows) if digest in live]
+        logger.info(f"Compacting embedding index: {len(self.rows)} -> {len(keep)} rows")
+        # The saved metadata still indexes the current file, so it is left untouched
+        compacted_path = os.path.join(self.index_dir, f"vectors-{os.urandom(4).hex()}.npy")
+        compacted = open_memmap(
+            compacted_path, mode='w+', dtype=np.float32, shape=(max(len(keep), 64), self.dimensions)
+        )
+        if keep:
+            compacted[:len(keep)] = self.vectors[keep]
+        compacted.flush()
+        del compacted
+        self.vectors = np.load(compacted_path, mmap_mode='r+')
+        self.vectors_path = compacted_path
+        self.rows = [self.rows[row] for row in keep]
+        self.row_of = {digest: row for row, digest in enumerate(self.rows)}
+
+    def search(self, query_vector: np.ndarray, top_k: int) -> List[Tuple[str, float]]:
+        """Return up to top_k (path, cosine similarity) pairs, best first."""
+        if not self.paths or self.vectors is None:
+            return []
+        query_vector = normalize(np.asarray(query_vector, dtype=np.float32))
+        row_scores = self.vectors[:len(self.rows)] @ query_vector
+        paths = list(self.paths)
+        path_rows = np.fromiter(
+            (self.row_of[self.paths[path][0]] for path in paths), dtype=np.int64, count=len(paths)
+        )
+        scores = row_scores[path_rows]
+        top_k = min(top_k, len(paths))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return [(paths[i], float(scores[i])) for i in best]
+
+    def save(self) -> None:
+        """Flush vectors, atomically write the metadata that references them, then drop superseded vectors."""
+        os.makedirs(self.index_dir, exist_ok=True)
+        if self.vectors is not None:
+            self.vectors.flush()
+        temp_path = f"{self.meta_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "embedder": self.embedder_name,
+                "dimensions": self.dimensions,
+                "vectors": os.path.basename(self.vectors_path),
+                "rows": self.rows,
+                "paths": self.paths
+            }, f)
+        os.replace(temp_path, self.meta_path)
+        for stale_path in glob.glob(os.path.join(self.index_dir, "vectors*.npy")):
+            if stale_path != self.vectors_path:
+                os.remove(stale_path)
+
+def _read_for_embedding(repo_path: Path, relative_path: str, max_lines: int) -> Tuple[str, str]:
+    preview = read_file_safely(str(repo_path / relative_path), max_lines) or ""
+    return preview, content_hash(f"{relative_path}\0{preview}")
+
+async def update_index(index: EmbeddingIndex, embedder, repo_path: str, config: Dict) -> Dict:
+    """Bring the index up to date with the repository, embedding only new content.
+
+    Files are read and embedded embeddingChunkSize at a time and the index is
+    saved after each chunk, so memory stays bounded and a failure part-way
+    keeps the embeddings made so far.
+    """
+    repo_path = Path(repo_path)
+    max_lines = config.get("embeddingLines", 200)
+    chunk_size = config.get("embeddingChunkSize", 256)
+    paths: Dict[str, list] = {}
+    to_read: List[Tuple[str, int, int]] = []
+
+    for relative_path in walk_repository_files(repo_path, get_default_ignore_patterns()):
+        try:
+            stat = os.stat(repo_path / relative_path)
+        except OSError:
+            continue
+        entry = index.paths.get(relative_path)
+        if entry is not None and entry[1:] == [stat.st_mtime_ns, stat.st_size] and entry[0] in index.row_of:
+            paths[relative_path] = entry
+        else:
+            to_read.append((relative_path, stat.st_mtime_ns, stat.st_size))
+
+    embedded = 0
+    if to_read:
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=config.get("readerThreads", 8)) as pool:
+            for start in range(0, len(to_read), chunk_size):
+                chunk = to_read[start:start + chunk_size]
+                reads = await asyncio.gather(*(
+                    loop.run_in_executor(pool, _read_for_embedding, repo_path, relative_path, max_lines)
+                    for relative_path, _, _ in chunk
+                ))
+                pending: Dict[str, Tuple[str, str]] = {}
+                for (relative_path, mtime_ns, size), (preview, digest) in zip(chunk, reads):
+                    paths[relative_path] = [digest, mtime_ns, size]
+                    if digest not in index.row_of:
+                        pending[digest] = (relative_path, preview)
+                if not pending:
+                    continue
+
+                logger.info(f"Embedding {len(pending)} new or changed files ({start + len(chunk)}/{len(to_read)} read)")
+                digests = list(pending)
+                vectors = await embedder.embed(
+                    [pending[digest][1] for digest in digests],
+                    [pending[digest][0] for digest in digests]
+                )
+                index.add(digests, vectors)
+                embedded += len(pending)
+                # Paths not reached yet keep their old entries until the final save
+                index.set_paths({**index.paths, **paths})
+                index.save()
+
+    index.set_paths(paths)
+    index.save()
+    return {
+        "indexed_files": len(paths),
+        "read_files": len(to_read),
+        "embedded_files": embedded
+    }
+
+def create_embedder(config: Dict, api_key: Optional[str]):
+    """Use the embeddings endpoint when configured and possible, else local hashed features.
+
+    Embedding calls are spread over the configured keys like chat calls, but
+    endpoints that override the chat model are left out: those serve another
+    model family and need not offer the OpenAI embedding model.
+    """
+    model = config.get("embeddingModel", EMBEDDING_MODEL)
+    dimensions = config.get("embeddingDimensions", EMBEDDING_DIMENSIONS)
+    if model == "local":
+        return HashedFeatureEmbedder(dimensions)
+    try:
+        pool = ClientPool.from_config(config, api_key)
+    except ValueError:
+        return HashedFeatureEmbedder(dimensions)
+    endpoints = [endpoint for endpoint in pool.endpoints if not endpoint.model]
+    if not endpoints:
+        return HashedFeatureEmbedder(dimensions)
+    return EndpointEmbedder(ClientPool(endpoints), model, dimensions)
+
+async def query_repository(repo_path: str, config: Dict, api_key: Optional[str]) -> Dict:
+    """Rank repository files against config["query"] by embedding similarity.
+
+    No per-file model calls are made; after the first run only changed files
+    are embedded. Returns the same shape as analyze_repository, plus scores.
+    """
+    start_time = time.time()
+    if not Path(repo_path).exists():
+        raise ValueError(f"Repository path does not exist: {repo_path}")
+    query = config["query"]
+    top_k = config.get("queryTopK", 20)
+    min_score = config.get("queryMinScore", 0.0)
+
+    embedder = create_embedder(config, api_key)
+    while True:
+        index = EmbeddingIndex(
+            config.get("embeddingIndexPath") or default_index_path(repo_path, embedder.name),
+            embedder.name,
+            embedder.dimensions
+        )
+        try:
+            update_stats = await update_index(index, embedder, repo_path, config)
+            query_vector = (await embedder.embed([query]))[0]
+            break
+        except Exception as e:
+            if isinstance(embedder, HashedFeatureEmbedder):
+                raise
+            logger.warning(f"Embeddings endpoint failed, falling back to local features: {str(e)}")
+            embedder = HashedFeatureEmbedder(embedder.dimensions)
+
+    search_start = time.perf_counter()
+    ranked = [(path, score) for path, score in index.search(query_vector, top_k) if score >= min_score]
+    search_time = time.perf_counter() - search_start
+
+    elapsed_time = time.time() - start_time
+    stats = {
+        **update_stats,
+        "embedder": embedder.name,
+        "search_time": f"{search_time * 1000:.2f}ms",
+        "processing_time": f"{elapsed_time:.2f}s"
+    }
+    logger.info(f"Query ranked {len(ranked)} files against: {query}")
+    for key, value in stats.items():
+        logger.info(f"- {key}: {value}")
+
+    return {
+        "relevantFiles": [path for path, _ in ranked],
+        "scores": {path: round(score, 4) for path, score in ranked},
+        "projectContext": {},
+        "statistics": stats
+    }
+
+async def main():
+    configure_logging()
+    try:
+        parser = argparse.ArgumentParser()
+        parser.add_argument("repo_path", help="Path to repository")
+        parser.add_argument("--query", required=True, help="Task description to rank files against")
+        parser.add_argument("--config", help="Repopack configuration")
+        args = parser.parse_args()
+
+        config = json.loads(args.config) if args.config else {}
+        config["query"] = args.query
+
+        result = await query_repository(args.repo_path, config, os.getenv("OPENAI_API_KEY"))
+        print(json.dumps(result))
+
+    except Exception as e:
+        logger.error(f"Fatal error: {str(e)}", exc_info=True)
+        print(json.dumps({
+            "error": str(e),
+            "relevantFiles": [],
+            "projectContext": {}
+        }))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+#heuristics.py
+from typing import Dict, Optional
+from pathlib import PurePath
+
+from providers.base import FileRelevance
+
+MANIFEST_NAMES = {
+    'package.json', 'pyproject.toml', 'setup.py', 'setup.cfg', 'requirements.txt',
+    'Pipfile', 'Cargo.toml', 'go.mod', 'pom.xml', 'build.gradle', 'build.gradle.kts',
+    'Gemfile', 'composer.json', 'tsconfig.json', 'Makefile', 'Dockerfile',
+    'docker-compose.yml', 'CMakeLists.txt'
+}
+
+ENTRY_POINT_STEMS = {
+    'main', 'index', 'app', 'cli', '__main__', 'server', 'manage', 'lib', 'mod'
+}
+
+SOURCE_EXTENSIONS = {
+    '.py', '.js', '.ts', '.jsx', '.tsx', '.mjs', '.cjs', '.go', '.rs', '.java',
+    '.kt', '.c', '.h', '.cpp', '.hpp', '.cs', '.rb', '.php', '.swift', '.scala',
+    '.sh', '.sql'
+}
+
+SUPPORTING_EXTENSIONS = {
+    '.md', '.rst', '.txt', '.json', '.yml', '.yaml', '.toml', '.ini', '.cfg', '.html', '.css'
+}
+
+LOCK_FILES = {
+    'package-lock.json', 'yarn.lock', 'pnpm-lock.yaml', 'poetry.lock', 'Pipfile.lock',
+    'Cargo.lock', 'go.sum', 'composer.lock', 'Gemfile.lock'
+}
+
+LOW_VALUE_DIRS = {
+    'test', 'tests', '__tests__', 'spec', 'fixtures', 'examples', 'example',
+    'docs', 'doc', 'vendor', 'third_party', 'generated', 'coverage', 'benchmarks'
+}
+
+def _matches_important_path(relative_path: str, important_path: str) -> bool:
+    important_path = important_path.strip()
+    if important_path.startswith('./'):
+        important_path = important_path[2:]
+    important_path = important_path.strip('/')
+    if not important_path:
+        return False
+    return (
+        relative_path == important_path
+        or relative_path.startswith(important_path + '/')
+        or PurePath(relative_path).name == important_path
+    )
+
+def matches_important_paths(relative_path: str, project_context: Optional[Dict] = None) -> bool:
+    """Whether the README analysis lists this file, or a directory holding it, as important."""
+    important_paths = (project_context or {}).get('important_paths', [])
+    return any(_matches_important_path(relative_path, important) for important in important_paths)
+
+def is_entry_point(relative_path: str) -> bool:
+    return PurePath(relative_path).stem.lower() in ENTRY_POINT_STEMS
+
+def priority_score(relative_path: str, project_context: Optional[Dict] = None) -> float:
+    """Estimate how important a file is likely to be, without reading it.
+
+    Uses the README analysis (important_paths, key_components), manifests,
+    entry points, file type and path depth. Higher is more important; scores
+    above zero lean relevant.
+    """
+    project_context = project_context or {}
+    path = PurePath(relative_path)
+    name = path.name
+    stem = path.stem.lower()
+    directories = [part.lower() for part in path.parts[:-1]]
+    score = 0.0
+
+    if name.lower().startswith('readme'):
+        score += 3.0
+    if name in MANIFEST_NAMES:
+        score += 2.5
+    if name in LOCK_FILES or name.endswith(('.min.js', '.min.css', '.map')):
+        score -= 3.0
+    if stem in ENTRY_POINT_STEMS:
+        score += 1.0
+
+    suffix = path.suffix.lower()
+    if suffix in SOURCE_EXTENSIONS:
+        score += 1.5
+    elif suffix in SUPPORTING_EXTENSIONS:
+        score += 0.5
+
+    if any(directory in LOW_VALUE_DIRS for directory in directories) or stem.startswith('test_') \
+            or stem.endswith(('.test', '.spec', '_test')):
+        score -= 2.0
+
+    if matches_important_paths(relative_path, project_context):
+        score += 3.0
+
+    path_tokens = {part.lower() for part in path.parts} | {stem}
+    for component in project_context.get('key_components', []):
+        words = {word.lower().strip('.,()`') for word in component.replace('/', ' ').split()}
+        if path_tokens & words:
+            score += 1.5
+            break
+
+    score -= 0.1 * len(directories)
+    return score
+
+def classify_file(
+    relative_path: str,
+    preview: Optional[str],
+    project_context: Optional[Dict] = None
+) -> FileRelevance:
+    """Decide a file's relevance locally when the model cannot be asked."""
+    if preview is None:
+        return FileRelevance(
+            path=relative_path,
+            is_relevant=False,
+            confidence=1.0,
+            reason="Binary or unreadable file - skipping analysis"
+        )
+    score = priority_score(relative_path, project_context)
+    return FileRelevance(
+        path=relative_path,
+        is_relevant=score > 0,
+        confidence=min(0.95, 0.6 + 0.1 * abs(score)),
+        reason=f"Heuristic classification (score {score:.1f})"
+    )
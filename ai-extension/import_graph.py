@@ -0,0 +1,277 @@
+#import_graph.py
+import ast
+import posixpath
+import re
+import sys
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional, Set
+from pathlib import Path
+import logging
+
+from heuristics import is_entry_point, matches_important_paths
+from providers.base import FileRelevance
+from providers.openai_provider import read_file_safely
+
+logger = logging.getLogger("ImportGraph")
+
+PYTHON_EXTENSIONS = {'.py'}
+JS_EXTENSIONS = ['.ts', '.tsx', '.js', '.jsx', '.mjs', '.cjs']
+GRAPH_EXTENSIONS = PYTHON_EXTENSIONS | set(JS_EXTENSIONS) | {'.go', '.rs'}
+
+# Modules that shadow a same-named local file, e.g. `import json` vs utils/json.py
+STDLIB_MODULES = set(getattr(sys, "stdlib_module_names", ()))
+
+JS_IMPORT_PATTERN = re.compile(
+    r"""(?:\bimport\s+(?:type\s+)?(?:[\w*${}\s,]+\s+from\s+)?"""
+    r"""|\bexport\s+(?:type\s+)?[\w*${}\s,]+\s+from\s+"""
+    r"""|\brequire\s*\(\s*|\bimport\s*\(\s*)['"]([^'"\n]+)['"]"""
+)
+PYTHON_IMPORT_PATTERN = re.compile(
+    r"^[ \t]*(?:from[ \t]+(\.*[\w.]*)[ \t]+import[ \t]+\(?([\w \t,*]+)|import[ \t]+([\w., \t]+))", re.M
+)
+GO_IMPORT_BLOCK_PATTERN = re.compile(r"^import\s*\((.*?)\)", re.M | re.S)
+GO_IMPORT_LINE_PATTERN = re.compile(r"^import\s+(?:[\w.]+\s+)?\"([^\"]+)\"", re.M)
+GO_SPEC_PATTERN = re.compile(r"\"([^\"]+)\"")
+GO_MODULE_PATTERN = re.compile(r"^module\s+(\S+)", re.M)
+RUST_MOD_PATTERN = re.compile(r"^\s*(?:pub(?:\([\w\s:]+\))?\s+)?mod\s+(\w+)\s*;", re.M)
+RUST_USE_PATTERN = re.compile(r"\buse\s+crate::([\w:]+)")
+
+def _python_imports(content: str) -> List[tuple]:
+    """Return (module, level, names) for each import statement."""
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        # The scanned head can end mid-statement; fall back to a line match
+        imports = []
+        for match in PYTHON_IMPORT_PATTERN.finditer(content):
+            if match.group(3):
+                imports.extend((name.strip(), 0, []) for name in match.group(3).split(',') if name.strip())
+            else:
+                dotted = match.group(1)
+                module = dotted.lstrip('.')
+                names = [name.strip() for name in match.group(2).split(',') if name.strip()]
+                imports.append((module, len(dotted) - len(module), names))
+        return imports
+
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend((alias.name, 0, []) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append((node.module or "", node.level, [alias.name for alias in node.names]))
+    return imports
+
+class _Resolver:
+    """Maps import specifiers to files of the repository."""
+
+    def __init__(self, files: Iterable[str], go_modules: Dict[str, str]):
+        self.files = set(files)
+        self.go_modules = go_modules
+        self.python_modules: Dict[str, List[str]] = defaultdict(list)
+        self.directories: Dict[str, List[str]] = defaultdict(list)
+        for relative_path in self.files:
+            path = Path(relative_path)
+            self.directories[posixpath.dirname(relative_path)].append(relative_path)
+            if path.suffix == '.py':
+                parts = list(path.with_suffix('').parts)
+                if parts[-1] == '__init__':
+                    parts.pop()
+                # Any suffix may be importable, depending on which directory is on sys.path
+                for start in range(len(parts)):
+                    self.python_modules['.'.join(parts[start:])].append(relative_path)
+
+    def _nearest(self, importer: str, candidates: List[str]) -> Optional[str]:
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+        importer_parts = Path(importer).parts
+        def shared_prefix(candidate: str) -> int:
+            count = 0
+            for left, right in zip(importer_parts, Path(candidate).parts):
+                if left != right:
+                    break
+                count += 1
+            return count
+        return max(candidates, key=shared_prefix)
+
+    def python(self, importer: str, module: str, level: int, names: List[str]) -> Set[str]:
+        targets = set()
+        if level:
+            base = posixpath.dirname(importer)
+            for _ in range(level - 1):
+                base = posixpath.dirname(base)
+            module_dir = posixpath.join(base, *module.split('.')) if module else base
+            for name in names or [""]:
+                for candidate in (
+                    posixpath.join(module_dir, name + '.py') if name else None,
+                    posixpath.join(module_dir, name, '__init__.py') if name else None,
+                    module_dir + '.py',
+                    posixpath.join(module_dir, '__init__.py')
+                ):
+                    if candidate in self.files:
+                        targets.add(candidate)
+                        break
+            return targets
+
+        if module.split('.')[0] in STDLIB_MODULES:
+            return targets
+        for name in names or [""]:
+            for dotted in (f"{module}.{name}" if name else None, module):
+                target = dotted and self._nearest(importer, self.python_modules.get(dotted, []))
+                if target:
+                    targets.add(target)
+                    break
+        return targets
+
+    def javascript(self, importer: str, specifier: str) -> Set[str]:
+        if not specifier.startswith('.'):
+            return set()
+        target = posixpath.normpath(posixpath.join(posixpath.dirname(importer), specifier))
+        # TypeScript ESM imports name the emitted .js file
+        stem, extension = posixpath.splitext(target)
+        bases = [target, stem] if extension in JS_EXTENSIONS else [target]
+        for base in bases:
+            for candidate in [base, *(base + ext for ext in JS_EXTENSIONS),
+                              *(posixpath.join(base, 'index' + ext) for ext in JS_EXTENSIONS)]:
+                if candidate in self.files:
+                    return {candidate}
+        return set()
+
+    def go(self, specifier: str) -> Set[str]:
+        for module, module_dir in self.go_modules.items():
+            if specifier == module or specifier.startswith(module + '/'):
+                package_dir = posixpath.normpath(posixpath.join(module_dir, specifier[len(module):].lstrip('/')))
+                package_dir = '' if package_dir == '.' else package_dir
+                return {
+                    path for path in self.directories.get(package_dir, [])
+                    if path.endswith('.go') and not path.endswith('_test.go')
+                }
+        return set()
+
+    def rust_module(self, importer: str, name: str) -> Set[str]:
+        path = Path(importer)
+        module_dir = posixpath.dirname(importer)
+        if path.name not in ('lib.rs', 'main.rs', 'mod.rs'):
+            module_dir = posixpath.join(module_dir, path.stem)
+        for candidate in (posixpath.join(module_dir, name + '.rs'), posixpath.join(module_dir, name, 'mod.rs')):
+            if candidate in self.files:
+                return {candidate}
+        return set()
+
+    def rust_crate_path(self, importer: str, crate_path: str) -> Set[str]:
+        parts = Path(importer).parts
+        root = posixpath.join(*parts[:parts.index('src') + 1]) if 'src' in parts[:-1] else posixpath.dirname(importer)
+        segments = [segment for segment in crate_path.split('::') if segment]
+        for end in range(len(segments), 0, -1):
+            module_path = posixpath.join(root, *segments[:end])
+            for candidate in (module_path + '.rs', posixpath.join(module_path, 'mod.rs')):
+                if candidate in self.files:
+                    return {candidate}
+        return set()
+
+def file_imports(resolver: _Resolver, relative_path: str, content: str) -> Set[str]:
+    """Return the repository files imported by one source file."""
+    suffix = Path(relative_path).suffix
+    targets: Set[str] = set()
+    if suffix in PYTHON_EXTENSIONS:
+        for module, level, names in _python_imports(content):
+            targets |= resolver.python(relative_path, module, level, names)
+    elif suffix in JS_EXTENSIONS:
+        for specifier in JS_IMPORT_PATTERN.findall(content):
+            targets |= resolver.javascript(relative_path, specifier)
+    elif suffix == '.go':
+        specifiers = GO_IMPORT_LINE_PATTERN.findall(content)
+        for block in GO_IMPORT_BLOCK_PATTERN.findall(content):
+            specifiers.extend(GO_SPEC_PATTERN.findall(block))
+        for specifier in specifiers:
+            targets |= resolver.go(specifier)
+    elif suffix == '.rs':
+        for name in RUST_MOD_PATTERN.findall(content):
+            targets |= resolver.rust_module(relative_path, name)
+        for crate_path in RUST_USE_PATTERN.findall(content):
+            targets |= resolver.rust_crate_path(relative_path, crate_path)
+    targets.discard(relative_path)
+    return targets
+
+def build_import_graph(
+    repo_path: Path,
+    relative_paths: List[str],
+    scan_lines: int = 200,
+    read: Callable[[str, int], Optional[str]] = read_file_safely
+) -> Dict[str, Set[str]]:
+    """Return the undirected import graph of the repository's source files.
+
+    Only the first scan_lines lines of each file are parsed. Files without any
+    resolved import edge are left out.
+    """
+    repo_path = Path(repo_path)
+    go_modules = {}
+    for relative_path in relative_paths:
+        if posixpath.basename(relative_path) == 'go.mod':
+            match = GO_MODULE_PATTERN.search(read(str(repo_path / relative_path), scan_lines) or "")
+            if match:
+                go_modules[match.group(1)] = posixpath.dirname(relative_path)
+
+    sources = [path for path in relative_paths if Path(path).suffix in GRAPH_EXTENSIONS]
+    resolver = _Resolver(sources, go_modules)
+    neighbours: Dict[str, Set[str]] = defaultdict(set)
+    for relative_path in sources:
+        content = read(str(repo_path / relative_path), scan_lines)
+        if not content:
+            continue
+        for target in file_imports(resolver, relative_path, content):
+            neighbours[relative_path].add(target)
+            neighbours[target].add(relative_path)
+
+    edges = sum(len(adjacent) for adjacent in neighbours.values()) // 2
+    logger.info(f"Import graph: {len(neighbours)} connected files, {edges} edges")
+    return dict(neighbours)
+
+def is_seed(relative_path: str, project_context: Optional[Dict] = None) -> bool:
+    """Seeds are always evaluated by the model; their verdicts drive propagation."""
+    return is_entry_point(relative_path) or matches_important_paths(relative_path, project_context)
+
+def relevance_probability(evaluation: FileRelevance) -> float:
+    return evaluation.confidence if evaluation.is_relevant else 1.0 - evaluation.confidence
+
+def propagate(
+    neighbours: Dict[str, Set[str]],
+    seed_scores: Dict[str, float],
+    decay: float = 0.7,
+    iterations: int = 20
+) -> Dict[str, float]:
+    """Spread seed relevance probabilities along import edges.
+
+    Each non-seed file takes the mean of its neighbours' scores, pulled
+    towards the uninformed 0.5 by decay, so influence fades with distance.
+    Seed scores stay fixed.
+    """
+    scores = {node: seed_scores.get(node, 0.5) for node in neighbours}
+    free = [node for node in neighbours if node not in seed_scores]
+    for _ in range(iterations):
+        updated = {
+            node: 0.5 + decay * (sum(scores[adjacent] for adjacent in neighbours[node]) / len(neighbours[node]) - 0.5)
+            for node in free
+        }
+        change = max((abs(updated[node] - scores[node]) for node in free), default=0.0)
+        scores.update(updated)
+        if change < 1e-4:
+            break
+    return scores
+
+def propagated_verdicts(scores: Dict[str, float], seed_scores: Dict[str, float], threshold: float) -> Dict[str, FileRelevance]:
+    """Turn propagated scores into verdicts, leaving out files that stay ambiguous.
+
+    A file is decided locally only when its score clears the relevance
+    threshold or is as far below 0.5 as the threshold is above it.
+    """
+    verdicts = {}
+    for path, score in scores.items():
+        if path in seed_scores:
+            continue
+        if score >= threshold:
+            verdicts[path] = FileRelevance(path, True, score, f"Imports relevant files (propagated score {score:.2f})")
+        elif score <= 1.0 - threshold:
+            verdicts[path] = FileRelevance(path, False, 1.0 - score, f"Imports irrelevant files (propagated score {score:.2f})")
+    return verdicts
@@ -0,0 +1,122 @@
+#multi_analyze.py
+import asyncio
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+from pathlib import Path
+import argparse
+import logging
+import time
+
+from analyze import SharedResources, analyze_repository, configure_logging
+from providers.circuit_breaker import CircuitBreaker
+from providers.client_pool import ClientPool, endpoint_specs
+
+logger = logging.getLogger("MultiAnalyzer")
+
+def load_manifest(manifest_path: str) -> List[str]:
+    """Read repository paths from a JSON list or a text file with one path per line.
+
+    Relative paths are resolved against the manifest's directory; blank lines
+    and lines starting with '#' are skipped in text manifests.
+    """
+    base_dir = Path(manifest_path).parent
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if content.lstrip().startswith('['):
+        entries = json.loads(content)
+    else:
+        entries = [
+            line.strip() for line in content.splitlines()
+            if line.strip() and not line.strip().startswith('#')
+        ]
+    return [str(base_dir / entry) for entry in entries]
+
+async def analyze_repositories(
+    repo_paths: List[str],
+    config: Dict,
+    api_key: Optional[str]
+) -> Dict:
+    """Analyze several repositories with one client and one API concurrency budget.
+
+    Up to maxRepositories analyses run at once; together they never have more
+    than globalConcurrency API calls in flight.
+    """
+    start_time = time.time()
+    shared = SharedResources(
+        client=ClientPool.from_config(config, api_key),
+        api_slots=asyncio.Semaphore(config.get("globalConcurrency", 16)),
+        # All repositories talk to the same backend, so they share its health
+        circuit_breaker=CircuitBreaker.from_config(config) if config.get("circuitBreaker", True) else None
+    )
+    repo_slots = asyncio.Semaphore(config.get("maxRepositories", 4))
+
+    async def analyze_one(repo_path: str) -> Dict:
+        async with repo_slots:
+            return await analyze_repository(repo_path, config, api_key, shared)
+
+    logger.info(f"Analyzing {len(repo_paths)} repositories")
+    results = await asyncio.gather(*(analyze_one(repo_path) for repo_path in repo_paths))
+    repositories = dict(zip(repo_paths, results))
+
+    elapsed_time = time.time() - start_time
+    succeeded = [result for result in results if "error" not in result]
+    total_files = sum(result["statistics"]["total_files"] for result in succeeded)
+    api_calls = sum(result["statistics"]["api_calls"] for result in succeeded)
+    stats = {
+        "repositories": len(repo_paths),
+        "failed_repositories": len(results) - len(succeeded),
+        "total_files": total_files,
+        "relevant_files": sum(len(result["relevantFiles"]) for result in succeeded),
+        "cached_files": sum(result["statistics"]["cached_files"] for result in succeeded),
+        "api_calls": api_calls,
+        "degraded_files": sum(result["statistics"]["degraded_files"] for result in succeeded),
+        "files_per_second": round(total_files / elapsed_time, 2) if elapsed_time > 0 else 0.0,
+        "api_calls_per_second": round(api_calls / elapsed_time, 2) if elapsed_time > 0 else 0.0,
+        "processing_time": f"{elapsed_time:.2f}s"
+    }
+
+    logger.info("Multi-repository analysis complete!")
+    for key, value in stats.items():
+        logger.info(f"- {key}: {value}")
+
+    return {
+        "repositories": repositories,
+        "statistics": stats
+    }
+
+async def main():
+    configure_logging()
+    try:
+        parser = argparse.ArgumentParser()
+        parser.add_argument("repo_paths", nargs="*", help="Paths to repositories")
+        parser.add_argument("--manifest", help="JSON list or text file of repository paths")
+        parser.add_argument("--config", help="Repopack configuration applied to every repository")
+        args = parser.parse_args()
+
+        repo_paths = list(args.repo_paths)
+        if args.manifest:
+            repo_paths.extend(load_manifest(args.manifest))
+        if not repo_paths:
+            raise ValueError("No repositories given")
+
+        config = json.loads(args.config) if args.config else {}
+
+        api_key = os.getenv("OPENAI_API_KEY")
+        endpoint_specs(config, api_key)
+
+        result = await analyze_repositories(repo_paths, config, api_key)
+        print(json.dumps(result))
+
+    except Exception as e:
+        logger.error(f"Fatal error: {str(e)}", exc_info=True)
+        print(json.dumps({
+            "error": str(e),
+            "repositories": {},
+            "statistics": {}
+        }))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,14 +1,30 @@
 #base.py
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Set
 from dataclasses import dataclass
 
+def lazy_schema_getattr(module_name: str, names: Set[str]) -> Callable[[str], Any]:
+    """Build a module __getattr__ that loads the named models from .schemas on first access.
+
+    The pydantic response models live in .schemas so that importing a provider
+    module does not import pydantic.
+    """
+    def __getattr__(name: str):
+        if name in names:
+            from . import schemas
+            return getattr(schemas, name)
+        raise AttributeError(f"module {module_name!r} has no attribute {name!r}")
+    return __getattr__
+
 @dataclass
 class FileRelevance:
     path: str
     is_relevant: bool
     confidence: float
     reason: str
+    error: Optional[str] = None
+    # Model that made the verdict, when it came from an API call
+    model: Optional[str] = None
 
 class AIProviderBase(ABC):
     @abstractmethod
@@ -20,8 +36,8 @@ class AIProviderBase(ABC):
     async def evaluate_file_relevance(
         self, 
         file_path: str, 
-        file_preview: str,
+        file_preview: Optional[str],
         project_context: Dict[str, any]
     ) -> FileRelevance:
-        """Evaluate if a file is relevant for LLM context"""
+        """Evaluate if a file is relevant for LLM context (None preview means binary/unreadable)"""
         pass
\ No newline at end of file
@@ -0,0 +1,100 @@
+#circuit_breaker.py
+from collections import deque
+from typing import Callable, Dict
+import logging
+import time
+
+logger = logging.getLogger("CircuitBreaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the API while the circuit is open."""
+
+class CircuitBreaker:
+    """Stop calling a degraded backend and probe periodically until it recovers.
+
+    Calls are tracked over a sliding window; a call that fails or takes longer
+    than latency_threshold counts as bad. Once at least min_calls are in the
+    window and the bad fraction reaches error_rate, the circuit opens and
+    requests are refused. After probe_interval a single probe is let through:
+    success closes the circuit, failure re-opens it for another interval.
+    """
+
+    def __init__(
+        self,
+        error_rate: float = 0.5,
+        latency_threshold: float = 30.0,
+        window: int = 20,
+        min_calls: int = 5,
+        probe_interval: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.error_rate = error_rate
+        self.latency_threshold = latency_threshold
+        self.min_calls = min_calls
+        self.probe_interval = probe_interval
+        self.clock = clock
+        self.state = CLOSED
+        self.outcomes = deque(maxlen=window)
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.times_opened = 0
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "CircuitBreaker":
+        return cls(
+            error_rate=config.get("breakerErrorRate", 0.5),
+            latency_threshold=config.get("breakerLatencySeconds", 30.0),
+            window=config.get("breakerWindow", 20),
+            min_calls=config.get("breakerMinCalls", 5),
+            probe_interval=config.get("breakerProbeSeconds", 30.0)
+        )
+
+    def allow_request(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and self.clock() - self.opened_at >= self.probe_interval:
+            logger.info("Probing backend after cool-down")
+            self.state = HALF_OPEN
+            self.probe_in_flight = False
+        if self.state == HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self, latency: float) -> None:
+        if latency > self.latency_threshold:
+            self.record_failure()
+            return
+        if self.state == HALF_OPEN:
+            logger.info("Backend recovered, closing circuit")
+            self.state = CLOSED
+            self.outcomes.clear()
+            self.probe_in_flight = False
+            return
+        self.outcomes.append(True)
+
+    def record_failure(self) -> None:
+        if self.state == HALF_OPEN:
+            self._open()
+            return
+        self.outcomes.append(False)
+        if self.state == CLOSED and len(self.outcomes) >= self.min_calls:
+            failures = self.outcomes.count(False)
+            if failures / len(self.outcomes) >= self.error_rate:
+                self._open()
+
+    def cancel_probe(self) -> None:
+        """Free the half-open probe slot without an outcome, e.g. when the probe was cancelled."""
+        if self.state == HALF_OPEN:
+            self.probe_in_flight = False
+
+    def _open(self) -> None:
+        logger.warning(f"Opening circuit; retrying in {self.probe_interval}s")
+        self.state = OPEN
+        self.opened_at = self.clock()
+        self.probe_in_flight = False
+        self.times_opened += 1
@@ -0,0 +1,259 @@
+#client_pool.py
+import asyncio
+import os
+from collections import deque
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import logging
+import time
+
+from .lazy_client import LazyAsyncClient
+
+logger = logging.getLogger("ClientPool")
+
+RATE_LIMIT_COOLDOWN = 10.0
+# Consecutive failures after which an endpoint is rested
+FAILURES_BEFORE_COOLDOWN = 3
+MAX_FAILURE_COOLDOWN = 60.0
+
+# Duration of the upstream call behind the caller's last dispatch, without
+# the time spent waiting for an endpoint or on failed attempts
+call_latency: ContextVar[Optional[float]] = ContextVar("call_latency", default=None)
+# Model requested from the endpoint that answered the caller's last dispatch
+call_model: ContextVar[Optional[str]] = ContextVar("call_model", default=None)
+
+def endpoint_specs(config: Dict, api_key: Optional[str]) -> List[Dict]:
+    """Collect endpoint settings from config["apiEndpoints"], OPENAI_API_KEYS or the single key.
+
+    Each apiEndpoints entry takes apiKey or apiKeyEnv, and optionally baseUrl
+    (for OpenAI-compatible servers), model, maxConcurrency, requestsPerMinute
+    and name.
+    """
+    specs = []
+    for index, entry in enumerate(config.get("apiEndpoints") or []):
+        key = entry.get("apiKey") or os.getenv(entry.get("apiKeyEnv", ""), "")
+        if not key and not entry.get("baseUrl"):
+            raise ValueError(f"API endpoint {entry.get('name', index)} has neither a key nor a baseUrl")
+        specs.append({**entry, "apiKey": key or "unused", "name": entry.get("name") or f"endpoint-{index}"})
+    if not specs:
+        keys = [key.strip() for key in os.getenv("OPENAI_API_KEYS", "").split(",") if key.strip()]
+        if not keys and api_key:
+            keys = [api_key]
+        specs = [{"apiKey": key, "name": f"key-{index}"} for index, key in enumerate(keys)]
+    if not specs:
+        raise ValueError("No API key configured: set OPENAI_API_KEY, OPENAI_API_KEYS or apiEndpoints")
+    return specs
+
+def failure_kind(error: Exception) -> str:
+    """Classify a failed call as 'rate_limited', 'unhealthy' or 'request' (the caller's fault)."""
+    status = getattr(error, "status_code", None)
+    if status == 429 or type(error).__name__ == "RateLimitError":
+        return "rate_limited"
+    if status is None or status >= 500:
+        # Connection errors and timeouts carry no status
+        return "unhealthy"
+    return "request"
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+class PooledEndpoint:
+    """One API key or endpoint with its limits and health."""
+
+    def __init__(
+        self,
+        name: str,
+        client: LazyAsyncClient,
+        model: Optional[str] = None,
+        max_concurrency: int = 8,
+        requests_per_minute: Optional[int] = None
+    ):
+        self.name = name
+        self.client = client
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.in_flight = 0
+        self.recent_starts: deque = deque()
+        self.cooldown_until = 0.0
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+
+    def available(self, now: float) -> bool:
+        if now < self.cooldown_until or self.in_flight >= self.max_concurrency:
+            return False
+        if self.requests_per_minute:
+            while self.recent_starts and now - self.recent_starts[0] >= 60.0:
+                self.recent_starts.popleft()
+            if len(self.recent_starts) >= self.requests_per_minute:
+                return False
+        return True
+
+    def next_opening(self, now: float) -> Optional[float]:
+        """Seconds until a time-based limit lifts, or None if only a release can help."""
+        waits = []
+        if now < self.cooldown_until:
+            waits.append(self.cooldown_until - now)
+        if self.requests_per_minute and len(self.recent_starts) >= self.requests_per_minute:
+            waits.append(self.recent_starts[0] + 60.0 - now)
+        return max(waits) if waits else None
+
+    def load(self) -> float:
+        return self.in_flight / self.max_concurrency
+
+class _Route:
+    """Attribute path into the client API, e.g. pool.chat.completions.create."""
+
+    def __init__(self, pool: "ClientPool", path: Tuple[str, ...]):
+        self._pool = pool
+        self._path = path
+
+    def __getattr__(self, name: str) -> "_Route":
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _Route(self._pool, self._path + (name,))
+
+    def __call__(self, **kwargs):
+        return self._pool.dispatch(self._path, kwargs)
+
+class ClientPool:
+    """Stand-in for the OpenAI client that spreads calls over several keys or endpoints.
+
+    Each call goes to the least-loaded endpoint that is within its concurrency
+    and requests-per-minute limits and not cooling down. Rate-limited
+    endpoints rest for their Retry-After; endpoints failing repeatedly rest
+    with a growing back-off. A call that hits a rate limit or an unhealthy
+    endpoint is retried on another one.
+    """
+
+    def __init__(self, endpoints: List[PooledEndpoint], clock: Callable[[], float] = time.monotonic):
+        self.endpoints = endpoints
+        self.clock = clock
+        self._released = asyncio.Event()
+
+    @classmethod
+    def from_config(cls, config: Dict, api_key: Optional[str]) -> "ClientPool":
+        endpoints = []
+        for spec in endpoint_specs(config, api_key):
+            client_kwargs = {"api_key": spec["apiKey"]}
+            if spec.get("baseUrl"):
+                client_kwargs["base_url"] = spec["baseUrl"]
+            endpoints.append(PooledEndpoint(
+                spec["name"],
+                LazyAsyncClient(**client_kwargs),
+                model=spec.get("model"),
+                max_concurrency=spec.get("maxConcurrency", config.get("endpointConcurrency", 8)),
+                requests_per_minute=spec.get("requestsPerMinute")
+            ))
+        if len(endpoints) > 1:
+            logger.info(f"Dispatching API calls over {len(endpoints)} endpoints")
+        return cls(endpoints)
+
+    @property
+    def initialized(self) -> bool:
+        return any(endpoint.client.initialized for endpoint in self.endpoints)
+
+    @property
+    def init_time(self) -> float:
+        return sum(endpoint.client.init_time for endpoint in self.endpoints)
+
+    def __getattr__(self, name: str) -> _Route:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return _Route(self, (name,))
+
+    def chat_models(self, default: str) -> Set[str]:
+        """Models that may answer a chat call requesting default."""
+        return {endpoint.model or default for endpoint in self.endpoints}
+
+    async def acquire(self) -> PooledEndpoint:
+        while True:
+            now = self.clock()
+            candidates = [endpoint for endpoint in self.endpoints if endpoint.available(now)]
+            if candidates:
+                # Ties go to the endpoint used least, so idle keys share the work
+                endpoint = min(candidates, key=lambda candidate: (candidate.load(), candidate.requests))
+                endpoint.in_flight += 1
+                endpoint.requests += 1
+                if endpoint.requests_per_minute:
+                    endpoint.recent_starts.append(now)
+                return endpoint
+            openings = [
+                opening for opening in (endpoint.next_opening(now) for endpoint in self.endpoints)
+                if opening is not None
+            ]
+            self._released.clear()
+            try:
+                await asyncio.wait_for(self._released.wait(), min(openings) if openings else None)
+            except asyncio.TimeoutError:
+                pass
+
+    def release(self, endpoint: PooledEndpoint, error: Optional[Exception] = None) -> bool:
+        """Return a slot and record the outcome; True if the call is worth retrying elsewhere."""
+        endpoint.in_flight -= 1
+        self._released.set()
+        if error is None:
+            endpoint.consecutive_failures = 0
+            return False
+
+        kind = failure_kind(error)
+        if kind == "request":
+            return False
+        endpoint.errors += 1
+        if kind == "rate_limited":
+            endpoint.rate_limited += 1
+            cooldown = _retry_after(error) or RATE_LIMIT_COOLDOWN
+        else:
+            endpoint.consecutive_failures += 1
+            if endpoint.consecutive_failures < FAILURES_BEFORE_COOLDOWN:
+                return True
+            cooldown = min(
+                MAX_FAILURE_COOLDOWN,
+                2.0 ** (endpoint.consecutive_failures - FAILURES_BEFORE_COOLDOWN + 1)
+            )
+        endpoint.cooldown_until = max(endpoint.cooldown_until, self.clock() + cooldown)
+        logger.warning(f"Resting endpoint {endpoint.name} for {cooldown:.1f}s after {kind} error: {str(error)}")
+        return True
+
+    async def dispatch(self, path: Tuple[str, ...], kwargs: Dict):
+        for attempt in range(len(self.endpoints)):
+            endpoint = await self.acquire()
+            target = endpoint.client
+            for name in path:
+                target = getattr(target, name)
+            call_kwargs = dict(kwargs)
+            if endpoint.model and path[0] == "chat":
+                call_kwargs["model"] = endpoint.model
+            started = time.monotonic()
+            try:
+                result = await target(**call_kwargs)
+            except asyncio.CancelledError:
+                endpoint.in_flight -= 1
+                self._released.set()
+                raise
+            except Exception as e:
+                if not self.release(endpoint, e) or attempt == len(self.endpoints) - 1:
+                    raise
+                logger.info(f"Retrying call on another endpoint after failure on {endpoint.name}")
+            else:
+                call_latency.set(time.monotonic() - started)
+                call_model.set(call_kwargs.get("model"))
+                self.release(endpoint)
+                return result
+
+    def get_statistics(self) -> Dict[str, Dict[str, int]]:
+        return {
+            endpoint.name: {
+                "requests": endpoint.requests,
+                "errors": endpoint.errors,
+                "rate_limited": endpoint.rate_limited
+            }
+            for endpoint in self.endpoints
+        }
@@ -0,0 +1,32 @@
+#lazy_client.py
+import logging
+import time
+
+logger = logging.getLogger("LazyAsyncClient")
+
+class LazyAsyncClient:
+    """Stand-in for openai.AsyncClient that imports openai and builds the client on first use.
+
+    Runs whose verdicts all come from the cache never touch the API, so they
+    never pay for importing openai or constructing its HTTP client.
+    """
+
+    def __init__(self, **client_kwargs):
+        self._client_kwargs = client_kwargs
+        self._client = None
+        self.init_time = 0.0
+
+    @property
+    def initialized(self) -> bool:
+        return self._client is not None
+
+    def __getattr__(self, name: str):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        if self._client is None:
+            start_time = time.perf_counter()
+            from openai import AsyncClient
+            self._client = AsyncClient(**self._client_kwargs)
+            self.init_time = time.perf_counter() - start_time
+            logger.info(f"Initialized OpenAI client (took {self.init_time:.2f}s)")
+        return getattr(self._client, name)
@@ -1,38 +1,21 @@
 #openai_provider.py
-from typing import Dict, List, Optional
-from pydantic import BaseModel
-from openai import AsyncClient
-from .base import AIProviderBase, FileRelevance
+from typing import Dict, List, Optional, Set, Union
+from .base import AIProviderBase, FileRelevance, lazy_schema_getattr
+from .circuit_breaker import HALF_OPEN, CircuitBreaker, CircuitOpenError
+from .client_pool import ClientPool, call_latency, call_model, failure_kind
+from .lazy_client import LazyAsyncClient
 import logging
 from pathlib import Path
+import asyncio
 import time
 import json
+from itertools import islice
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger("OpenAIProvider")
 
-class CodeContext(BaseModel):
-    file_type: str
-    purpose: str
-    relevance_score: float
-    key_components: List[str]
-    dependencies: List[str]
-
-class ReadmeAnalysis(BaseModel):
-    project_purpose: str
-    core_features: List[str]
-    key_components: List[str]
-    important_patterns: List[str]
-    dependencies: List[str]
-
-class FileAnalysis(BaseModel):
-    is_relevant: bool
-    confidence: float
-    reason: str
+SCHEMA_MODELS = {"CodeContext", "ReadmeAnalysis", "FileAnalysis"}
+
+__getattr__ = lazy_schema_getattr(__name__, SCHEMA_MODELS)
 
 README_SCHEMA = {
     "type": "object",
@@ -48,6 +31,8 @@ README_SCHEMA = {
     "additionalProperties": False
 }
 
+FILE_EVALUATION_MODEL = "gpt-4o"
+
 FILE_ANALYSIS_SCHEMA = {
     "type": "object",
     "properties": {
@@ -115,11 +100,11 @@ def read_file_safely(file_path: str, max_lines: int = 50) -> Optional[str]:
             
         if is_known_text_file(file_path):
             with open(file_path, 'r', encoding='utf-8') as f:
-                return "".join(f.readlines()[:max_lines])
+                return "".join(islice(f, max_lines))
 
         # For unknown extensions, try to read and check content
         with open(file_path, 'r', encoding='utf-8') as f:
-            content = "".join(f.readlines()[:max_lines])
+            content = "".join(islice(f, max_lines))
             if is_binary_content(content):
                 return None
             return content
@@ -128,13 +113,66 @@ def read_file_safely(file_path: str, max_lines: int = 50) -> Optional[str]:
         logger.debug(f"Could not read file as text: {file_path}")
         return None
 
+def build_file_evaluation_messages(
+    file_path: str,
+    content: str,
+    project_context: Dict[str, any]
+) -> List[Dict[str, str]]:
+    """Build the chat messages asking whether a file is relevant."""
+    prompt = f"""Given the project context and file information, output a JSON object with the following structure:
+            {FILE_ANALYSIS_SCHEMA}
+            
+            Remember:
+            - All fields are required
+            - No additional properties are allowed
+            - confidence must be a number between 0 and 1
+            - is_relevant must be a boolean
+            - reason must be a string explaining your decision
+
+            Project Context:
+            {json.dumps(project_context, indent=2)}
+
+            File Path: {file_path}
+            Content Preview:
+            {content}
+
+            Consider:
+            1. Is this file essential for understanding the project's core functionality?
+            2. Does it contain implementation details mentioned in the README?
+            3. Is it a configuration file needed for project setup?
+            4. Is it a core dependency or requirement file?
+            """
+    return [
+        {"role": "system", "content": "You are an expert code analyst. You must output valid JSON matching the specified schema."},
+        {"role": "user", "content": prompt}
+    ]
+
+def parse_file_analysis(file_path: str, response_content: str) -> FileRelevance:
+    """Validate a JSON file evaluation returned by the model."""
+    from .schemas import FileAnalysis
+    analysis = FileAnalysis.model_validate_json(response_content)
+    return FileRelevance(
+        path=file_path,
+        is_relevant=analysis.is_relevant,
+        confidence=analysis.confidence,
+        reason=analysis.reason
+    )
+
 class OpenAIProvider(AIProviderBase):
-    def __init__(self, api_key: str):
+    def __init__(
+        self,
+        api_key: str,
+        client: Optional[Union[LazyAsyncClient, ClientPool]] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None
+    ):
         logger.info("Initializing OpenAI provider with AsyncClient")
-        self.client = AsyncClient(api_key=api_key)
+        # The client (and openai itself) is only built once an API call is made
+        self.client = client or LazyAsyncClient(api_key=api_key)
+        self.circuit_breaker = circuit_breaker
         self.files_processed = 0
         self.binary_files_skipped = 0
         self.errors_encountered = 0
+        self.calls_refused = 0
         
     async def analyze_readme(self, content: str) -> Dict[str, any]:
         """Analyze README content using OpenAI's structured output."""
@@ -168,6 +206,7 @@ class OpenAIProvider(AIProviderBase):
             logger.info(f"Received README analysis response (took {api_time:.2f}s)")
             
             # Parse the response into our Pydantic model
+            from .schemas import ReadmeAnalysis
             analysis = ReadmeAnalysis.model_validate_json(
                 response.choices[0].message.content
             )
@@ -194,15 +233,18 @@ class OpenAIProvider(AIProviderBase):
     async def evaluate_file_relevance(
         self, 
         file_path: str, 
-        file_preview: str,
+        file_preview: Optional[str],
         project_context: Dict[str, any]
     ) -> FileRelevance:
-        """Evaluate if a file is relevant using structured outputs."""
+        """Evaluate if a file is relevant using structured outputs.
+
+        file_preview is the output of read_file_safely; None marks a binary or
+        unreadable file, which is rejected without an API call.
+        """
         self.files_processed += 1
         logger.info(f"\nEvaluating file [{self.files_processed}]: {file_path}")
 
-        # Check if we can read the file
-        content = read_file_safely(file_path)
+        content = file_preview
         if content is None:
             self.binary_files_skipped += 1
             logger.info(f"Skipping binary/unreadable file: {file_path}")
@@ -213,57 +255,44 @@ class OpenAIProvider(AIProviderBase):
                 reason="Binary or unreadable file - skipping analysis"
             )
 
+        breaker = self.circuit_breaker
+        if breaker is not None and not breaker.allow_request():
+            self.calls_refused += 1
+            raise CircuitOpenError(f"Circuit open, not evaluating {file_path}")
+        probing = breaker is not None and breaker.state == HALF_OPEN
+
         try:
             logger.info(f"File preview length: {len(file_preview)} characters")
             start_time = time.time()
-
-            prompt = f"""Given the project context and file information, output a JSON object with the following structure:
-            {FILE_ANALYSIS_SCHEMA}
-            
-            Remember:
-            - All fields are required
-            - No additional properties are allowed
-            - confidence must be a number between 0 and 1
-            - is_relevant must be a boolean
-            - reason must be a string explaining your decision
-
-            Project Context:
-            {json.dumps(project_context, indent=2)}
-
-            File Path: {file_path}
-            Content Preview:
-            {content}
-
-            Consider:
-            1. Is this file essential for understanding the project's core functionality?
-            2. Does it contain implementation details mentioned in the README?
-            3. Is it a configuration file needed for project setup?
-            4. Is it a core dependency or requirement file?
-            """
+            call_latency.set(None)
+            call_model.set(None)
 
             logger.info(f"Making API call to evaluate file: {file_path}")
-            response = await self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": "You are an expert code analyst. You must output valid JSON matching the specified schema."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"}
-            )
+            try:
+                response = await self.client.chat.completions.create(
+                    model=FILE_EVALUATION_MODEL,
+                    messages=build_file_evaluation_messages(file_path, content, project_context),
+                    response_format={"type": "json_object"}
+                )
+            except Exception as e:
+                # Only connection errors, timeouts, 5xx and 429 say the backend is
+                # degraded; a rejected request does not
+                if breaker is not None and failure_kind(e) != "request":
+                    breaker.record_failure()
+                elif probing:
+                    breaker.cancel_probe()
+                raise
 
             api_time = time.time() - start_time
             logger.info(f"Received API response (took {api_time:.2f}s)")
+            if breaker is not None:
+                # Behind a client pool, queueing for a free endpoint is not backend latency
+                upstream_time = call_latency.get()
+                breaker.record_success(api_time if upstream_time is None else upstream_time)
 
-            analysis = FileAnalysis.model_validate_json(
-                response.choices[0].message.content
-            )
-            
-            result = FileRelevance(
-                path=file_path,
-                is_relevant=analysis.is_relevant,
-                confidence=analysis.confidence,
-                reason=analysis.reason
-            )
+            result = parse_file_analysis(file_path, response.choices[0].message.content)
+            # A pool endpoint may answer with its own model instead of the one requested
+            result.model = call_model.get() or FILE_EVALUATION_MODEL
 
             logger.info("File Analysis Results:")
             logger.info(f"- Path: {result.path}")
@@ -277,7 +306,14 @@ class OpenAIProvider(AIProviderBase):
             logger.info(f"- Errors encountered: {self.errors_encountered}")
             
             return result
-            
+
+        except asyncio.CancelledError:
+            # A call cut off by a deadline says nothing about the backend, but
+            # must not leave a half-open probe outstanding
+            if probing:
+                breaker.cancel_probe()
+            raise
+
         except Exception as e:
             self.errors_encountered += 1
             logger.error(f"Error evaluating file {file_path}: {str(e)}", exc_info=True)
@@ -285,13 +321,21 @@ class OpenAIProvider(AIProviderBase):
                 path=file_path,
                 is_relevant=True,  # Default to including file if evaluation fails
                 confidence=0.0,
-                reason=f"Evaluation failed: {str(e)}"
+                reason=f"Evaluation failed: {str(e)}",
+                error=str(e)
             )
 
+    def evaluation_models(self) -> Set[str]:
+        """Models that may answer evaluate_file_relevance, for matching cached verdicts."""
+        if isinstance(self.client, ClientPool):
+            return self.client.chat_models(FILE_EVALUATION_MODEL)
+        return {FILE_EVALUATION_MODEL}
+
     def get_statistics(self) -> Dict[str, int]:
         """Return current processing statistics."""
         return {
             "files_processed": self.files_processed,
             "binary_files_skipped": self.binary_files_skipped,
-            "errors_encountered": self.errors_encountered
+            "errors_encountered": self.errors_encountered,
+            "calls_refused": self.calls_refused
         }
\ No newline at end of file
@@ -1,44 +1,22 @@
 #readme_analyzer.py
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
 from pathlib import Path
-from pydantic import BaseModel
-from openai import AsyncClient
 import logging
 import time
 import json
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+from .base import lazy_schema_getattr
+
 logger = logging.getLogger("ReadmeAnalyzer")
 
-class RelevanceMetrics(BaseModel):
-    score: float
-    keywords_matched: List[str]
-    context_relevance: float
-    file_type_importance: float
-
-class FileInsight(BaseModel):
-    path: str
-    type: str
-    purpose: str
-    relevance: RelevanceMetrics
-    key_features: List[str]
-
-class ReadmeSection(BaseModel):
-    title: str
-    content: str
-    importance: float
-
-class ProjectContext(BaseModel):
-    main_purpose: str
-    core_features: List[str]
-    key_components: List[str]
-    tech_stack: List[str]
-    file_patterns: List[str]
-    important_paths: List[str]
+if TYPE_CHECKING:
+    from .client_pool import ClientPool
+    from .lazy_client import LazyAsyncClient
+    from .schemas import FileInsight, ProjectContext
+
+SCHEMA_MODELS = {"RelevanceMetrics", "FileInsight", "ReadmeSection", "ProjectContext"}
+
+__getattr__ = lazy_schema_getattr(__name__, SCHEMA_MODELS)
 
 def is_known_text_file(file_path: str) -> bool:
     """Check if the file has a known text file extension."""
@@ -106,7 +84,7 @@ def read_file_safely(file_path: str, max_lines: int = 50) -> Optional[str]:
         return None
 
 class ReadmeAnalyzer:
-    def __init__(self, openai_client: AsyncClient):
+    def __init__(self, openai_client: Union["LazyAsyncClient", "ClientPool"]):
         logger.info("Initializing ReadmeAnalyzer")
         self.client = openai_client
         self.files_processed = 0
@@ -224,6 +202,7 @@ class ReadmeAnalyzer:
             logger.info(f"Received README analysis response (took {api_time:.2f}s)")
 
             # Parse into Pydantic model
+            from .schemas import ProjectContext
             result = ProjectContext.model_validate_json(
                 response.choices[0].message.content
             )
@@ -256,9 +235,10 @@ class ReadmeAnalyzer:
         self,
         file_path: str,
         file_preview: str,
-        project_context: ProjectContext
-    ) -> FileInsight:
+        project_context: "ProjectContext"
+    ) -> "FileInsight":
         """Evaluate a file's relevance using structured outputs."""
+        from .schemas import FileInsight, RelevanceMetrics
         self.files_processed += 1
         logger.info(f"\nEvaluating file [{self.files_processed}]: {file_path}")
         start_time = time.time()
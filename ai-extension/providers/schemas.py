@@ -0,0 +1,48 @@
+#schemas.py
+from typing import List
+from pydantic import BaseModel
+
+class CodeContext(BaseModel):
+    file_type: str
+    purpose: str
+    relevance_score: float
+    key_components: List[str]
+    dependencies: List[str]
+
+class ReadmeAnalysis(BaseModel):
+    project_purpose: str
+    core_features: List[str]
+    key_components: List[str]
+    important_patterns: List[str]
+    dependencies: List[str]
+
+class FileAnalysis(BaseModel):
+    is_relevant: bool
+    confidence: float
+    reason: str
+
+class RelevanceMetrics(BaseModel):
+    score: float
+    keywords_matched: List[str]
+    context_relevance: float
+    file_type_importance: float
+
+class FileInsight(BaseModel):
+    path: str
+    type: str
+    purpose: str
+    relevance: RelevanceMetrics
+    key_features: List[str]
+
+class ReadmeSection(BaseModel):
+    title: str
+    content: str
+    importance: float
+
+class ProjectContext(BaseModel):
+    main_purpose: str
+    core_features: List[str]
+    key_components: List[str]
+    tech_stack: List[str]
+    file_patterns: List[str]
+    important_paths: List[str]
@@ -0,0 +1,50 @@
+from pathlib import Path
+import pytest
+import analyze
+from providers.base import FileRelevance
+from providers.openai_provider import FILE_EVALUATION_MODEL
+
+PROJECT_CONTEXT = {"main_purpose": "test"}
+
+class FakeProvider:
+    """Stands in for OpenAIProvider: a file is relevant when its preview contains "keep"."""
+
+    def __init__(self, api_key=None, client=None, circuit_breaker=None):
+        self.calls = []
+        self.previews = {}
+        self.contexts = []
+
+    async def evaluate_file_relevance(self, file_path, file_preview, project_context):
+        self.calls.append(file_path)
+        self.previews[file_path] = file_preview
+        self.contexts.append(project_context)
+        relevant = file_preview is not None and "keep" in file_preview
+        return FileRelevance(path=file_path, is_relevant=relevant, confidence=0.9, reason="fake")
+
+    def evaluation_models(self):
+        return {FILE_EVALUATION_MODEL}
+
+class FakeReadmeAnalyzer:
+    """Stands in for ReadmeAnalyzer: finds README.md and analyzes it to PROJECT_CONTEXT."""
+
+    def __init__(self, client=None):
+        self.errors_encountered = 0
+        self.analyses = 0
+
+    def load_readme(self, repo_path):
+        readme = Path(repo_path) / "README.md"
+        return readme.read_text() if readme.exists() else None
+
+    async def analyze_readme(self, content):
+        self.analyses += 1
+        return dict(PROJECT_CONTEXT)
+
+@pytest.fixture(autouse=True)
+def isolated_cache_directory(tmp_path_factory, monkeypatch):
+    """Keep per-repository caches out of the user's cache directory."""
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path_factory.mktemp("cache")))
+
+@pytest.fixture
+def fake_readme(monkeypatch):
+    """Make analyze_repository use FakeReadmeAnalyzer."""
+    monkeypatch.setattr(analyze, "ReadmeAnalyzer", FakeReadmeAnalyzer)
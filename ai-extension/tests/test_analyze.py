@@ -0,0 +1,190 @@
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+import pytest
+import analyze
+from providers.base import FileRelevance
+from providers.openai_provider import read_file_safely
+from tests.conftest import PROJECT_CONTEXT, FakeProvider, FakeReadmeAnalyzer
+
+class SlowReadmeAnalyzer(FakeReadmeAnalyzer):
+    finished_at = None
+
+    async def analyze_readme(self, content):
+        await asyncio.sleep(0.2)
+        SlowReadmeAnalyzer.finished_at = time.monotonic()
+        return await super().analyze_readme(content)
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "README.md").write_text("readme")
+    (repo / "src" / "deep" / "er").mkdir(parents=True)
+    (repo / "src" / "main.py").write_text("keep\n" * 100)
+    (repo / "src" / "deep" / "er" / "util.py").write_text("keep")
+    (repo / "src" / "junk.py").write_text("drop")
+    (repo / "logo.png").write_bytes(b"\x89PNG")
+    (repo / "node_modules" / "dep").mkdir(parents=True)
+    (repo / "node_modules" / "dep" / "index.js").write_text("keep")
+    return repo
+
+@pytest.fixture
+def fakes(monkeypatch):
+    read_times = []
+
+    def timed_read(file_path, max_lines=50):
+        read_times.append(time.monotonic())
+        return read_file_safely(file_path, max_lines)
+
+    providers = []
+    def make_provider(api_key, client=None, circuit_breaker=None):
+        providers.append(FakeProvider(api_key))
+        return providers[-1]
+
+    monkeypatch.setattr(analyze, "ReadmeAnalyzer", SlowReadmeAnalyzer)
+    monkeypatch.setattr(analyze, "OpenAIProvider", make_provider)
+    monkeypatch.setattr(analyze, "read_file_safely", timed_read)
+    return read_times, providers
+
+def test_walk_prunes_ignored_directories(repo):
+    files = sorted(analyze.walk_repository_files(repo, analyze.get_default_ignore_patterns()))
+    assert files == ["README.md", "logo.png", "src/deep/er/util.py", "src/junk.py", "src/main.py"]
+
+@pytest.mark.asyncio
+async def test_pipeline_results(repo, fakes):
+    _, providers = fakes
+    result = await analyze.analyze_repository(
+        str(repo), {"maxPreviewLines": 3, "queueSize": 1, "maxConcurrency": 2, "cache": False}, "key"
+    )
+
+    assert result["relevantFiles"] == ["src/deep/er/util.py", "src/main.py"]
+    assert result["statistics"]["total_files"] == 5
+    assert result["statistics"]["files_processed"] == 5
+    assert result["statistics"]["binary_files"] == 1
+    assert providers[0].previews["src/main.py"] == "keep\n" * 3
+    assert all(context == PROJECT_CONTEXT for context in providers[0].contexts)
+
+@pytest.mark.asyncio
+async def test_reading_overlaps_readme_analysis(repo, fakes):
+    read_times, _ = fakes
+    await analyze.analyze_repository(str(repo), {"cache": False}, "key")
+    assert read_times and min(read_times) < SlowReadmeAnalyzer.finished_at
+
+@pytest.mark.asyncio
+async def test_cached_verdicts_skip_the_provider(repo, fakes, tmp_path):
+    _, providers = fakes
+    config = {"cachePath": str(tmp_path / "cache.json")}
+    first = await analyze.analyze_repository(str(repo), config, "key")
+    (repo / "src" / "junk.py").write_text("keep now")
+    second = await analyze.analyze_repository(str(repo), config, "key")
+
+    assert first["statistics"]["cached_files"] == 0
+    assert second["statistics"]["cached_files"] == 3
+    # The README call is counted only when its analysis is not cached
+    assert (first["statistics"]["api_calls"], second["statistics"]["api_calls"]) == (5, 1)
+    assert sorted(providers[1].previews) == ["logo.png", "src/junk.py"]
+    assert second["relevantFiles"] == ["src/deep/er/util.py", "src/junk.py", "src/main.py"]
+
+def test_fully_cached_run_never_imports_openai(repo, tmp_path):
+    from cache import VerdictCache, context_key
+    from providers.base import FileRelevance
+    from providers.openai_provider import FILE_EVALUATION_MODEL, read_file_safely
+
+    cache_path = str(tmp_path / "cache.json")
+    project_context = {"main_purpose": "test"}
+    cache = VerdictCache(cache_path)
+    cache.put_readme("readme", project_context)
+    key = context_key(project_context, FILE_EVALUATION_MODEL)
+    for path in ["README.md", "src/main.py", "src/junk.py", "src/deep/er/util.py"]:
+        preview = read_file_safely(str(repo / path))
+        cache.put(path, preview, key, FileRelevance(path, path == "src/main.py", 0.9, "cached"))
+    cache.save()
+
+    script = (
+        "import asyncio, json, sys, analyze;"
+        f"r = asyncio.run(analyze.analyze_repository({str(repo)!r}, {{'cachePath': {cache_path!r}}}, 'key'));"
+        "print(json.dumps([r, 'openai' in sys.modules, 'pydantic' in sys.modules]))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=Path(analyze.__file__).parent,
+        capture_output=True,
+        text=True,
+        check=True
+    ).stdout
+    result, openai_imported, pydantic_imported = json.loads(output)
+
+    assert result["relevantFiles"] == ["src/main.py"]
+    assert result["statistics"]["cached_files"] == 4
+    assert result["statistics"]["client_init_time"] == "not needed"
+    assert not openai_imported and not pydantic_imported
+
+@pytest.mark.asyncio
+async def test_deadline_evaluates_important_files_first(repo, fakes, monkeypatch):
+    calls = []
+
+    class SlowProvider(FakeProvider):
+        async def evaluate_file_relevance(self, file_path, file_preview, project_context):
+            calls.append(file_path)
+            await asyncio.sleep(0.15)
+            return await super().evaluate_file_relevance(file_path, file_preview, project_context)
+
+    monkeypatch.setattr(analyze, "OpenAIProvider", SlowProvider)
+    (repo / "package.json").write_text("{}")
+    (repo / "tests").mkdir()
+    (repo / "tests" / "test_main.py").write_text("keep")
+
+    result = await analyze.analyze_repository(
+        str(repo), {"cache": False, "maxConcurrency": 1, "readerThreads": 1, "deadlineSeconds": 0.5}, "key"
+    )
+
+    assert calls[:2] == ["README.md", "package.json"]
+    assert "tests/test_main.py" not in calls
+    assert result["statistics"]["deadline_reached"] is True
+    assert result["statistics"]["heuristic_files"] >= 1
+    assert result["statistics"]["files_processed"] == 7
+
+@pytest.mark.asyncio
+async def test_adaptive_preview_only_escalates_borderline_files(repo, fakes, monkeypatch):
+    calls = []
+
+    class ConfidenceProvider(FakeProvider):
+        async def evaluate_file_relevance(self, file_path, file_preview, project_context):
+            calls.append((file_path, file_preview.count("\n") if file_preview else None))
+            confidence = 0.75 if file_path == "src/main.py" else 0.95
+            return FileRelevance(path=file_path, is_relevant=True, confidence=confidence, reason="fake")
+
+    monkeypatch.setattr(analyze, "OpenAIProvider", ConfidenceProvider)
+    (repo / "src" / "long.py").write_text("keep\n" * 100)
+
+    result = await analyze.analyze_repository(
+        str(repo), {"cache": False, "adaptivePreview": True, "firstPassLines": 10}, "key"
+    )
+
+    assert sorted(call for call in calls if call[0] in ("src/main.py", "src/long.py")) == [
+        ("src/long.py", 10), ("src/main.py", 10), ("src/main.py", 50)
+    ]
+    assert result["statistics"]["second_pass_files"] == 1
+
+@pytest.mark.asyncio
+async def test_adaptive_preview_escalates_on_relevance_probability():
+    class NegativeProvider:
+        def __init__(self, confidence):
+            self.confidence = confidence
+            self.calls = 0
+
+        async def evaluate_file_relevance(self, file_path, file_preview, project_context):
+            self.calls += 1
+            return FileRelevance(path=file_path, is_relevant=False, confidence=self.confidence, reason="fake")
+
+    preview = "line\n" * 50
+    confident, unsure = NegativeProvider(0.75), NegativeProvider(0.55)
+    _, confident_second = await analyze.evaluate_adaptively(confident, "a.py", preview, {}, 0.7, 10, 0.15)
+    _, unsure_second = await analyze.evaluate_adaptively(unsure, "b.py", preview, {}, 0.7, 10, 0.15)
+
+    assert (confident_second, confident.calls) == (False, 1)
+    assert (unsure_second, unsure.calls) == (True, 2)
@@ -0,0 +1,153 @@
+import json
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from openai import AsyncClient
+from batch import analyze_repository_batch, default_state_path, load_state, submit_batch
+
+def completion(content):
+    return {
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "gpt-4o",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": json.dumps(content)}
+        }]
+    }
+
+class StandInBatchServer(ThreadingHTTPServer):
+    """Minimal local implementation of the files, batches and chat endpoints."""
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.uploads = []
+        self.retrievals = {}
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def reply(self, payload, content_type="application/json"):
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def batch(self, number, status):
+        return {
+            "id": f"batch_{number}",
+            "object": "batch",
+            "endpoint": "/v1/chat/completions",
+            "input_file_id": f"file-in-{number}",
+            "completion_window": "24h",
+            "created_at": 0,
+            "status": status,
+            "output_file_id": f"file-out-{number}" if status == "completed" else None,
+            "error_file_id": None
+        }
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.path == "/v1/chat/completions":
+            self.reply(completion({
+                "main_purpose": "test", "core_features": [], "key_components": [],
+                "tech_stack": [], "file_patterns": [], "important_paths": []
+            }))
+        elif self.path == "/v1/files":
+            lines = re.findall(rb'^\{"custom_id".*$', body, re.MULTILINE)
+            self.server.uploads.append([json.loads(line) for line in lines])
+            self.reply({
+                "id": f"file-in-{len(self.server.uploads)}", "object": "file", "bytes": len(body), "created_at": 0,
+                "filename": "requests.jsonl", "purpose": "batch", "status": "processed"
+            })
+        elif self.path == "/v1/batches":
+            number = int(json.loads(body)["input_file_id"].rsplit("-", 1)[1])
+            self.reply(self.batch(number, "validating"))
+
+    def do_GET(self):
+        if self.path.startswith("/v1/batches/batch_"):
+            number = int(self.path.rsplit("_", 1)[1])
+            self.server.retrievals[number] = self.server.retrievals.get(number, 0) + 1
+            self.reply(self.batch(number, "in_progress" if self.server.retrievals[number] < 2 else "completed"))
+        elif self.path.startswith("/v1/files/file-out-"):
+            number = int(self.path.split("/")[3].rsplit("-", 1)[1])
+            lines = []
+            for request in self.server.uploads[number - 1]:
+                prompt = request["body"]["messages"][1]["content"]
+                verdict = {"is_relevant": "keep" in prompt, "confidence": 0.9, "reason": "stand-in"}
+                lines.append(json.dumps({
+                    "id": "req", "custom_id": request["custom_id"], "error": None,
+                    "response": {"status_code": 200, "body": completion(verdict)}
+                }))
+            self.reply("\n".join(lines).encode(), "application/octet-stream")
+
+@pytest.fixture
+def server():
+    server = StandInBatchServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+
+@pytest.fixture
+def client(server):
+    return AsyncClient(api_key="test", base_url=f"http://127.0.0.1:{server.server_port}/v1")
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    (repo / "README.md").write_text("readme")
+    (repo / "src" / "main.py").write_text("keep")
+    (repo / "src" / "junk.py").write_text("drop")
+    (repo / "logo.png").write_bytes(b"\x89PNG")
+    return repo
+
+@pytest.mark.asyncio
+async def test_batch_round_trip(server, client, repo, tmp_path):
+    state_path = str(tmp_path / "state.json")
+    result = await analyze_repository_batch(str(repo), {"batchPollInterval": 0}, client, state_path)
+
+    assert result["relevantFiles"] == ["src/main.py"]
+    assert result["statistics"]["total_files"] == 4
+    assert result["statistics"]["binary_files"] == 1
+    assert result["statistics"]["batch_requests"] == 3
+    assert result["statistics"]["errors"] == 0
+    assert sorted(r["custom_id"] for r in server.uploads[0]) == ["README.md", "src/junk.py", "src/main.py"]
+    assert not (tmp_path / "state.json").exists()
+
+@pytest.mark.asyncio
+async def test_batch_resumes_from_state(server, client, repo, tmp_path):
+    state_path = str(tmp_path / "state.json")
+    await submit_batch(client, str(repo), {}, state_path)
+    assert load_state(state_path)["batch_ids"] == ["batch_1"]
+
+    result = await analyze_repository_batch(str(repo), {"batchPollInterval": 0}, client, state_path)
+    assert len(server.uploads) == 1
+    assert result["relevantFiles"] == ["src/main.py"]
+
+@pytest.mark.asyncio
+async def test_requests_are_split_over_batches_at_the_limits(server, client, repo, tmp_path):
+    (repo / "src" / "util.py").write_text("keep")
+    state_path = str(tmp_path / "state.json")
+    result = await analyze_repository_batch(
+        str(repo), {"batchPollInterval": 0, "batchMaxRequests": 2}, client, state_path
+    )
+
+    assert [len(upload) for upload in server.uploads] == [2, 2]
+    assert result["statistics"]["batches"] == 2
+    assert result["statistics"]["errors"] == 0
+    assert result["relevantFiles"] == ["src/main.py", "src/util.py"]
+
+    await submit_batch(client, str(repo), {"batchMaxBytes": 1}, state_path)
+    assert len(load_state(state_path)["batch_ids"]) == 4
+
+def test_default_state_lives_in_the_cache_directory(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert default_state_path("repo").startswith(str(tmp_path / "repopack"))
@@ -0,0 +1,35 @@
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+EXTENSION_DIR = Path(__file__).resolve().parent.parent
+
+def run_benchmark(workdir, sleep, *options):
+    return subprocess.run(
+        [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider",
+         f"--benchmark-storage=file://{workdir / 'store'}", *options],
+        cwd=workdir,
+        env={"BENCH_SLEEP": str(sleep), "PATH": ""},
+        capture_output=True,
+        text=True
+    )
+
+def test_regression_against_baseline_fails_the_run(tmp_path):
+    (tmp_path / "conftest.py").write_text(
+        f"import sys\nsys.path.insert(0, {str(EXTENSION_DIR)!r})\n"
+        "from benchmarks.conftest import pytest_sessionstart\n"
+    )
+    (tmp_path / "test_sleep.py").write_text(
+        "import os, time\n"
+        "def test_sleep(benchmark):\n"
+        "    benchmark.pedantic(time.sleep, args=(float(os.environ['BENCH_SLEEP']),), rounds=3)\n"
+    )
+
+    baseline = run_benchmark(tmp_path, 0.001, "--benchmark-autosave")
+    assert baseline.returncode == 0, baseline.stdout
+    regressed = run_benchmark(tmp_path, 0.01, "--benchmark-compare")
+    assert regressed.returncode != 0
+    assert "Performance has regressed" in regressed.stdout + regressed.stderr
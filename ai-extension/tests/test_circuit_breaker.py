@@ -0,0 +1,163 @@
+import asyncio
+import json
+import pytest
+import analyze
+from providers.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+from providers.client_pool import ClientPool, PooledEndpoint
+from providers.openai_provider import OpenAIProvider
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def make_breaker(clock):
+    return CircuitBreaker(error_rate=0.5, latency_threshold=5.0, window=4, min_calls=4, probe_interval=10.0, clock=clock)
+
+def test_opens_on_error_rate_and_recovers_after_probe():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    breaker.record_success(1.0)
+    breaker.record_success(1.0)
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+    breaker.record_success(9.0)  # too slow, counts as bad
+    assert breaker.state == OPEN
+    assert not breaker.allow_request()
+
+    clock.now = 10.0
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()  # only one probe at a time
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.times_opened == 2
+
+    clock.now = 20.0
+    assert breaker.allow_request()
+    breaker.record_success(1.0)
+    assert breaker.state == CLOSED
+    assert breaker.allow_request()
+
+def test_cancelled_probe_frees_the_probe_slot():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now = 10.0
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+    breaker.cancel_probe()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow_request()
+
+class FailingCompletions:
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **kwargs):
+        self.calls += 1
+        raise RuntimeError("503 Service Unavailable")
+
+class FailingClient:
+    def __init__(self):
+        self.chat = type("Chat", (), {})()
+        self.chat.completions = FailingCompletions()
+
+@pytest.mark.asyncio
+async def test_failing_backend_degrades_to_heuristics(tmp_path, monkeypatch, fake_readme):
+    failing_client = FailingClient()
+
+    def make_provider(api_key, client=None, circuit_breaker=None):
+        return OpenAIProvider(api_key, client=failing_client, circuit_breaker=circuit_breaker)
+
+    monkeypatch.setattr(analyze, "OpenAIProvider", make_provider)
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    (repo / "README.md").write_text("readme")
+    (repo / "package.json").write_text("{}")
+    (repo / "yarn.lock").write_text("lock")
+    for index in range(10):
+        (repo / "src" / f"module_{index}.py").write_text("code")
+
+    result = await analyze.analyze_repository(
+        str(repo), {"cache": False, "maxConcurrency": 1, "breakerMinCalls": 3, "breakerWindow": 3}, "key"
+    )
+
+    stats = result["statistics"]
+    assert failing_client.chat.completions.calls == 3
+    assert stats["api_errors"] == 3
+    assert stats["degraded_files"] == 13
+    assert stats["circuit_state"] == OPEN
+    assert "package.json" in result["relevantFiles"]
+    assert "yarn.lock" not in result["relevantFiles"]
+
+class SlowClient:
+    """A backend that answers every evaluation after a fixed delay, or raises error."""
+
+    def __init__(self, delay, content=None, error=None):
+        self.delay = delay
+        self.content = content or json.dumps({"is_relevant": True, "confidence": 0.9, "reason": "ok"})
+        self.error = error
+        self.chat = self
+        self.completions = self
+
+    async def create(self, **kwargs):
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        message = type("Message", (), {"content": self.content})()
+        return type("Response", (), {"choices": [type("Choice", (), {"message": message})()]})()
+
+@pytest.mark.asyncio
+async def test_queueing_for_a_pooled_endpoint_is_not_latency():
+    pool = ClientPool([PooledEndpoint("key", SlowClient(0.2), max_concurrency=1)])
+    breaker = CircuitBreaker(latency_threshold=0.5, window=8, min_calls=4)
+    provider = OpenAIProvider("key", client=pool, circuit_breaker=breaker)
+
+    results = await asyncio.gather(*(
+        provider.evaluate_file_relevance(f"src/module_{index}.py", "code", {}) for index in range(8)
+    ))
+
+    assert all(result.error is None for result in results)
+    assert breaker.state == CLOSED
+
+class BadRequestError(Exception):
+    status_code = 400
+
+@pytest.mark.asyncio
+async def test_rejected_requests_and_bad_json_do_not_count_against_the_backend():
+    breaker = CircuitBreaker(window=2, min_calls=2)
+    for client in (SlowClient(0, error=BadRequestError("400 context too long")), SlowClient(0, content="not json")):
+        provider = OpenAIProvider("key", client=client, circuit_breaker=breaker)
+        for index in range(2):
+            result = await provider.evaluate_file_relevance(f"src/module_{index}.py", "code", {})
+            assert result.error
+    assert breaker.state == CLOSED
+
+    provider = OpenAIProvider("key", client=SlowClient(0, error=RuntimeError("503 Service Unavailable")), circuit_breaker=breaker)
+    await provider.evaluate_file_relevance("src/module_0.py", "code", {})
+    assert breaker.state == OPEN
+
+@pytest.mark.asyncio
+async def test_deadline_cut_off_is_not_a_backend_failure(tmp_path, monkeypatch, fake_readme):
+    def make_provider(api_key, client=None, circuit_breaker=None):
+        return OpenAIProvider(api_key, client=SlowClient(5.0), circuit_breaker=circuit_breaker)
+
+    monkeypatch.setattr(analyze, "OpenAIProvider", make_provider)
+    repo = tmp_path / "repo"
+    (repo / "src").mkdir(parents=True)
+    (repo / "README.md").write_text("readme")
+    for index in range(4):
+        (repo / "src" / f"module_{index}.py").write_text("code")
+
+    result = await analyze.analyze_repository(
+        str(repo), {"cache": False, "deadlineSeconds": 0.3, "breakerMinCalls": 1}, "key"
+    )
+
+    stats = result["statistics"]
+    assert stats["deadline_reached"]
+    assert stats["api_errors"] == 0
+    assert stats["circuit_state"] == CLOSED
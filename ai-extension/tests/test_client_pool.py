@@ -0,0 +1,119 @@
+import asyncio
+import json
+from types import SimpleNamespace
+import pytest
+from cache import VerdictCache, context_key
+from providers.client_pool import ClientPool, PooledEndpoint, endpoint_specs
+from providers.openai_provider import OpenAIProvider
+
+class FakeClient:
+    """Mimics client.chat.completions.create with a scripted outcome."""
+
+    def __init__(self, name, error=None, delay=0.01):
+        self.name = name
+        self.error = error
+        self.delay = delay
+        self.models = []
+        self.in_flight = 0
+        self.peak = 0
+        self.chat = self
+        self.completions = self
+
+    async def create(self, **kwargs):
+        self.models.append(kwargs["model"])
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error:
+                raise self.error
+            return self.name
+        finally:
+            self.in_flight -= 1
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self):
+        super().__init__("429 Too Many Requests")
+        self.response = type("Response", (), {"headers": {"retry-after": "30"}})()
+
+@pytest.mark.asyncio
+async def test_calls_go_to_the_least_loaded_endpoint_within_limits():
+    clients = [FakeClient(f"key-{n}") for n in range(3)]
+    pool = ClientPool([PooledEndpoint(client.name, client, max_concurrency=2) for client in clients])
+
+    results = await asyncio.gather(*(
+        pool.chat.completions.create(model="gpt-4o", messages=[]) for _ in range(12)
+    ))
+
+    assert sorted(results) == sorted([f"key-{n}" for n in range(3)] * 4)
+    assert all(client.peak == 2 for client in clients)
+    assert [stats["requests"] for stats in pool.get_statistics().values()] == [4, 4, 4]
+
+@pytest.mark.asyncio
+async def test_rate_limited_endpoint_rests_and_call_is_retried():
+    now = [100.0]
+    limited = FakeClient("limited", error=RateLimitError())
+    local = FakeClient("local")
+    pool = ClientPool(
+        [PooledEndpoint("limited", limited), PooledEndpoint("local", local, model="llama3")],
+        clock=lambda: now[0]
+    )
+
+    assert await pool.chat.completions.create(model="gpt-4o") == "local"
+    assert await pool.chat.completions.create(model="gpt-4o") == "local"
+    assert limited.models == ["gpt-4o"]
+    assert local.models == ["llama3", "llama3"]
+    assert pool.get_statistics()["limited"] == {"requests": 1, "errors": 1, "rate_limited": 1}
+
+    limited.error = None
+    now[0] += 30
+    await asyncio.gather(*(pool.chat.completions.create(model="gpt-4o") for _ in range(2)))
+    assert limited.models == ["gpt-4o", "gpt-4o"]
+
+@pytest.mark.asyncio
+async def test_requests_per_minute_limit_delays_calls():
+    client = FakeClient("key", delay=0)
+    pool = ClientPool([PooledEndpoint("key", client, requests_per_minute=2)])
+    await pool.chat.completions.create(model="gpt-4o")
+    await pool.chat.completions.create(model="gpt-4o")
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(pool.chat.completions.create(model="gpt-4o"), 0.1)
+
+class ChatClient(FakeClient):
+    async def create(self, **kwargs):
+        await super().create(**kwargs)
+        message = SimpleNamespace(content=json.dumps({"is_relevant": True, "confidence": 0.9, "reason": "ok"}))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+@pytest.mark.asyncio
+async def test_verdicts_are_cached_under_the_model_that_answered():
+    pool = ClientPool([PooledEndpoint("local", ChatClient("local"), model="llama3")])
+    provider = OpenAIProvider("key", client=pool)
+    verdict = await provider.evaluate_file_relevance("src/main.py", "code", {})
+    assert verdict.model == "llama3"
+    assert provider.evaluation_models() == {"llama3"}
+
+    cache = VerdictCache(None)
+    cache.put("src/main.py", "code", context_key({}, verdict.model), verdict)
+    assert cache.get("src/main.py", "code", {context_key({}, "gpt-4o")}) is None
+    assert cache.get("src/main.py", "code", {context_key({}, "llama3")}).is_relevant
+
+    direct = OpenAIProvider("key", client=ChatClient("direct"))
+    assert (await direct.evaluate_file_relevance("src/main.py", "code", {})).model == "gpt-4o"
+
+def test_endpoint_specs(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEYS", "sk-a, sk-b")
+    assert [spec["apiKey"] for spec in endpoint_specs({}, "sk-single")] == ["sk-a", "sk-b"]
+
+    monkeypatch.setenv("TEAM_KEY", "sk-team")
+    specs = endpoint_specs({"apiEndpoints": [
+        {"apiKeyEnv": "TEAM_KEY", "requestsPerMinute": 500},
+        {"name": "ollama", "baseUrl": "http://localhost:11434/v1", "model": "llama3"}
+    ]}, None)
+    assert [(spec["name"], spec["apiKey"]) for spec in specs] == [("endpoint-0", "sk-team"), ("ollama", "unused")]
+
+    monkeypatch.delenv("OPENAI_API_KEYS")
+    with pytest.raises(ValueError):
+        endpoint_specs({}, None)
@@ -0,0 +1,111 @@
+import os
+import numpy as np
+import pytest
+from embedding_index import EmbeddingIndex, HashedFeatureEmbedder, query_repository, update_index
+
+@pytest.fixture
+def repo(tmp_path):
+    repo = tmp_path / "repo"
+    (repo / "src" / "auth").mkdir(parents=True)
+    (repo / "src" / "cli").mkdir(parents=True)
+    (repo / "src" / "auth" / "login.py").write_text(
+        "def login(user, password):\n    token = issue_token(user)\n    return verify_password(password)\n"
+    )
+    (repo / "src" / "auth" / "session.py").write_text("class SessionStore:\n    def refresh_token(self): ...\n")
+    (repo / "src" / "cli" / "main.py").write_text("import argparse\nparser = argparse.ArgumentParser()\n")
+    (repo / "README.md").write_text("A tool with a command line interface")
+    return repo
+
+@pytest.mark.asyncio
+async def test_query_ranks_matching_files_first(repo, tmp_path):
+    config = {"query": "user login password token", "embeddingIndexPath": str(tmp_path / "index")}
+    result = await query_repository(str(repo), config, None)
+
+    assert result["relevantFiles"][0] == "src/auth/login.py"
+    assert result["statistics"]["embedder"] == "hashed-512"
+    assert result["statistics"]["embedded_files"] == 4
+
+    config["query"] = "cli argparse parser"
+    result = await query_repository(str(repo), config, None)
+    assert result["relevantFiles"][0] == "src/cli/main.py"
+    assert result["statistics"]["read_files"] == 0
+
+@pytest.mark.asyncio
+async def test_updates_are_incremental_and_persistent(repo, tmp_path):
+    index_dir = str(tmp_path / "index")
+    embedder = HashedFeatureEmbedder(64)
+    index = EmbeddingIndex(index_dir, embedder.name, embedder.dimensions)
+    await update_index(index, embedder, str(repo), {})
+
+    login = repo / "src" / "auth" / "login.py"
+    login.write_text("def logout(): ...\n")
+    os.utime(login, ns=(1, 1))
+    (repo / "README.md").unlink()
+
+    reopened = EmbeddingIndex(index_dir, embedder.name, embedder.dimensions)
+    stats = await update_index(reopened, embedder, str(repo), {})
+    assert stats == {"indexed_files": 3, "read_files": 1, "embedded_files": 1}
+
+    again = EmbeddingIndex(index_dir, embedder.name, embedder.dimensions)
+    assert sorted(again.paths) == ["src/auth/login.py", "src/auth/session.py", "src/cli/main.py"]
+    assert again.search(embedder.embed_text("logout"), 1)[0][0] == "src/auth/login.py"
+    # An index built by a different embedder is not reused
+    assert len(EmbeddingIndex(index_dir, "hashed-128", 128)) == 0
+
+class FailingEmbeddings:
+    async def create(self, **kwargs):
+        raise RuntimeError("404 model not found")
+
+@pytest.mark.asyncio
+async def test_endpoint_failure_falls_back_to_local_features(repo, tmp_path, monkeypatch):
+    from providers import client_pool
+
+    class FailingClient:
+        def __init__(self, **kwargs):
+            self.embeddings = FailingEmbeddings()
+
+    monkeypatch.setattr(client_pool, "LazyAsyncClient", FailingClient)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    result = await query_repository(str(repo), {"query": "session token"}, "key")
+
+    assert result["relevantFiles"][0] == "src/auth/session.py"
+    assert result["statistics"]["embedder"] == "hashed-512"
+
+@pytest.mark.asyncio
+async def test_failed_update_keeps_the_chunks_already_embedded(repo, tmp_path):
+    class FlakyEmbedder(HashedFeatureEmbedder):
+        calls = 0
+
+        async def embed(self, texts, paths=None):
+            FlakyEmbedder.calls += 1
+            if FlakyEmbedder.calls == 2:
+                raise RuntimeError("503 Service Unavailable")
+            return await super().embed(texts, paths)
+
+    index_dir = str(tmp_path / "index")
+    embedder = FlakyEmbedder(64)
+    config = {"embeddingChunkSize": 2}
+    with pytest.raises(RuntimeError):
+        await update_index(EmbeddingIndex(index_dir, embedder.name, 64), embedder, str(repo), config)
+    assert len(EmbeddingIndex(index_dir, embedder.name, 64)) == 2
+
+    stats = await update_index(EmbeddingIndex(index_dir, embedder.name, 64), embedder, str(repo), config)
+    assert stats == {"indexed_files": 4, "read_files": 2, "embedded_files": 2}
+
+def test_compaction_is_not_visible_until_saved(tmp_path):
+    index_dir = str(tmp_path / "index")
+    index = EmbeddingIndex(index_dir, "test", 4)
+    index.add(["a", "b", "c"], np.eye(4, dtype=np.float32)[:3])
+    index.set_paths({"a.py": ["a", 0, 0], "b.py": ["b", 0, 0], "c.py": ["c", 0, 0]})
+    index.save()
+
+    index.set_paths({"c.py": ["c", 0, 0]})
+    assert index.rows == ["c"]
+    # A crash before save() must leave the saved index answering correctly
+    crashed = EmbeddingIndex(index_dir, "test", 4)
+    assert crashed.search(np.eye(4, dtype=np.float32)[0], 1)[0] == ("a.py", 1.0)
+
+    index.save()
+    reopened = EmbeddingIndex(index_dir, "test", 4)
+    assert reopened.search(np.eye(4, dtype=np.float32)[2], 1)[0] == ("c.py", 1.0)
+    assert len(list((tmp_path / "index").glob("vectors*.npy"))) == 1
@@ -0,0 +1,33 @@
+from heuristics import classify_file, priority_score
+
+CONTEXT = {
+    "important_paths": ["src/core/", "./config.yml"],
+    "key_components": ["Packager", "security check"]
+}
+
+def test_priority_order():
+    paths = [
+        "tests/fixtures/deep/sample.py",
+        "package-lock.json",
+        "src/utils/strings.ts",
+        "src/core/packager.ts",
+        "package.json",
+        "README.md",
+        "config.yml",
+        "src/security/check.ts",
+    ]
+    ranked = sorted(paths, key=lambda path: priority_score(path, CONTEXT), reverse=True)
+    assert ranked.index("README.md") < ranked.index("src/utils/strings.ts")
+    assert ranked.index("src/core/packager.ts") < ranked.index("src/utils/strings.ts")
+    assert ranked.index("config.yml") < ranked.index("src/utils/strings.ts")
+    assert ranked.index("src/security/check.ts") < ranked.index("src/utils/strings.ts")
+    assert set(ranked[-2:]) == {"tests/fixtures/deep/sample.py", "package-lock.json"}
+
+def test_priority_without_context():
+    assert priority_score("src/main.py") > priority_score("src/a/b/c/d/e/helper.py")
+
+def test_classify_file():
+    assert classify_file("logo.png", None).is_relevant is False
+    assert classify_file("package.json", "{}").is_relevant is True
+    assert classify_file("package-lock.json", "{}").is_relevant is False
+    assert classify_file("tests/test_main.py", "pass").is_relevant is False
@@ -0,0 +1,80 @@
+import pytest
+import analyze
+from import_graph import build_import_graph, propagate, propagated_verdicts
+from providers.base import FileRelevance
+from tests.conftest import FakeProvider
+
+def write_files(root, files):
+    for relative_path, content in files.items():
+        (root / relative_path).parent.mkdir(parents=True, exist_ok=True)
+        (root / relative_path).write_text(content)
+    return sorted(files)
+
+def test_graph_resolves_imports_per_language(tmp_path):
+    paths = write_files(tmp_path, {
+        "pkg/__init__.py": "",
+        "pkg/core.py": "import json\nfrom . import util\nfrom .models import User\n",
+        "pkg/util.py": "",
+        "pkg/models.py": "",
+        "app.py": "from pkg.core import run\nimport pkg.util\n",
+        "json.py": "",
+        "web/src/index.ts": "import { a } from './api.js';\nexport * from './components';\nimport x from 'react';\n",
+        "web/src/api.ts": "const c = require('../lib/client')\n",
+        "web/src/components/index.tsx": "",
+        "web/lib/client.js": "",
+        "go.mod": "module example.com/svc\n",
+        "cmd/main.go": "package main\n\nimport (\n\t\"fmt\"\n\tstore \"example.com/svc/store\"\n)\n",
+        "store/store.go": "package store\n",
+        "store/store_test.go": "package store\n",
+        "crate/src/lib.rs": "pub mod parser;\nuse crate::eval::run;\n",
+        "crate/src/parser.rs": "",
+        "crate/src/eval/mod.rs": "",
+    })
+
+    graph = build_import_graph(tmp_path, paths)
+
+    assert graph["pkg/core.py"] == {"pkg/util.py", "pkg/models.py", "app.py"}
+    assert graph["app.py"] == {"pkg/core.py", "pkg/util.py"}
+    assert "json.py" not in graph
+    assert graph["web/src/index.ts"] == {"web/src/api.ts", "web/src/components/index.tsx"}
+    assert graph["web/lib/client.js"] == {"web/src/api.ts"}
+    assert graph["cmd/main.go"] == {"store/store.go"}
+    assert graph["crate/src/lib.rs"] == {"crate/src/parser.rs", "crate/src/eval/mod.rs"}
+
+def test_propagation_decays_with_distance():
+    neighbours = {"main": {"a"}, "a": {"main", "b"}, "b": {"a"}, "x": {"test"}, "test": {"x"}}
+    seed_scores = {"main": 0.95, "test": 0.02}
+    scores = propagate(neighbours, seed_scores)
+    assert scores["main"] == 0.95
+    assert scores["a"] > scores["b"] > 0.5
+    assert scores["x"] < 0.3
+
+    verdicts = propagated_verdicts(scores, seed_scores, 0.7)
+    assert sorted(verdicts) == ["a", "x"]
+    assert verdicts["a"].is_relevant and not verdicts["x"].is_relevant
+
+@pytest.mark.asyncio
+async def test_only_seeds_and_ambiguous_files_reach_the_model(tmp_path, monkeypatch, fake_readme):
+    calls = []
+
+    class RecordingProvider(FakeProvider):
+        async def evaluate_file_relevance(self, file_path, file_preview, project_context):
+            calls.append(file_path)
+            return FileRelevance(path=file_path, is_relevant=True, confidence=0.95, reason="fake")
+
+    monkeypatch.setattr(analyze, "OpenAIProvider", RecordingProvider)
+    repo = tmp_path / "repo"
+    write_files(repo, {
+        "README.md": "readme",
+        "src/main.py": "from src import service\n",
+        "src/service.py": "from src import store\n",
+        "src/store.py": "",
+        "src/standalone.py": "",
+    })
+
+    result = await analyze.analyze_repository(str(repo), {"cache": False, "importGraph": True}, "key")
+
+    assert sorted(calls) == ["README.md", "src/main.py", "src/standalone.py", "src/store.py"]
+    assert result["relevantFiles"] == ["README.md", "src/main.py", "src/service.py", "src/standalone.py", "src/store.py"]
+    assert result["statistics"]["propagated_files"] == 1
+    assert result["statistics"]["graph_edges"] == 2
@@ -0,0 +1,54 @@
+import asyncio
+import json
+import pytest
+import analyze
+from multi_analyze import analyze_repositories, load_manifest
+from tests.conftest import FakeProvider
+
+class CountingProvider(FakeProvider):
+    in_flight = 0
+    peak = 0
+    clients = set()
+
+    def __init__(self, api_key, client=None, circuit_breaker=None):
+        super().__init__()
+        CountingProvider.clients.add(id(client))
+
+    async def evaluate_file_relevance(self, file_path, file_preview, project_context):
+        CountingProvider.in_flight += 1
+        CountingProvider.peak = max(CountingProvider.peak, CountingProvider.in_flight)
+        await asyncio.sleep(0.01)
+        CountingProvider.in_flight -= 1
+        return await super().evaluate_file_relevance(file_path, file_preview, project_context)
+
+def make_repo(root, files):
+    root.mkdir()
+    (root / "README.md").write_text("readme")
+    for index in range(files):
+        (root / f"file_{index}.py").write_text("keep" if index % 2 else "drop")
+    return str(root)
+
+@pytest.mark.asyncio
+async def test_repositories_share_client_and_concurrency_budget(tmp_path, monkeypatch, fake_readme):
+    monkeypatch.setattr(analyze, "OpenAIProvider", CountingProvider)
+    repos = [make_repo(tmp_path / f"repo{n}", 6) for n in range(3)]
+    repos.append(str(tmp_path / "missing"))
+
+    result = await analyze_repositories(
+        repos, {"cache": False, "maxConcurrency": 4, "globalConcurrency": 2}, "key"
+    )
+
+    assert CountingProvider.peak == 2
+    assert len(CountingProvider.clients) == 1
+    assert result["repositories"][repos[0]]["relevantFiles"] == ["file_1.py", "file_3.py", "file_5.py"]
+    assert result["statistics"]["repositories"] == 4
+    assert result["statistics"]["failed_repositories"] == 1
+    assert result["statistics"]["total_files"] == 21
+    # 21 file evaluations plus one README analysis per repository
+    assert result["statistics"]["api_calls"] == 24
+
+def test_load_manifest(tmp_path):
+    (tmp_path / "repos.txt").write_text("# org repos\nalpha\n\n/abs/beta\n")
+    (tmp_path / "repos.json").write_text(json.dumps(["gamma"]))
+    assert load_manifest(str(tmp_path / "repos.txt")) == [str(tmp_path / "alpha"), "/abs/beta"]
+    assert load_manifest(str(tmp_path / "repos.json")) == [str(tmp_path / "gamma")]
@@ -0,0 +1,151 @@
+import asyncio
+import pytest
+from watcher import InotifyWatcher, PollingWatcher, RelevanceWatcher
+from analyze import get_default_ignore_patterns
+from providers.base import FileRelevance
+from tests.conftest import FakeProvider, FakeReadmeAnalyzer
+
+def make_repo(tmp_path):
+    (tmp_path / "README.md").write_text("readme")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "main.py").write_text("keep")
+    (tmp_path / "src" / "junk.py").write_text("drop")
+    (tmp_path / "node_modules").mkdir()
+    (tmp_path / "node_modules" / "dep.js").write_text("keep")
+    return tmp_path
+
+@pytest.mark.asyncio
+async def test_changes_are_debounced_and_coalesced(tmp_path):
+    repo = make_repo(tmp_path)
+    provider = FakeProvider()
+    relevance_watcher = RelevanceWatcher(
+        str(repo), {"watchDebounceMs": 20}, provider, FakeReadmeAnalyzer()
+    )
+    await relevance_watcher.initialize()
+    assert relevance_watcher.relevant_files() == ["src/main.py"]
+
+    provider.calls.clear()
+    (repo / "src" / "junk.py").write_text("keep")
+    (repo / "src" / "main.py").write_text("keep this")
+    for _ in range(5):
+        relevance_watcher.notify({"src/junk.py"})
+    relevance_watcher.notify({"src/main.py"})
+    await asyncio.sleep(0.1)
+
+    assert sorted(provider.calls) == ["src/junk.py", "src/main.py"]
+    assert relevance_watcher.relevant_files() == ["src/junk.py", "src/main.py"]
+
+@pytest.mark.asyncio
+async def test_removed_directory_drops_verdicts(tmp_path):
+    repo = make_repo(tmp_path)
+    relevance_watcher = RelevanceWatcher(
+        str(repo), {"watchDebounceMs": 0}, FakeProvider(), FakeReadmeAnalyzer()
+    )
+    await relevance_watcher.initialize()
+    for child in (repo / "src").iterdir():
+        child.unlink()
+    (repo / "src").rmdir()
+
+    relevance_watcher.notify({"src"})
+    await asyncio.sleep(0.05)
+    assert set(relevance_watcher.verdicts) == {"README.md"}
+
+@pytest.mark.asyncio
+async def test_readme_change_refreshes_context(tmp_path):
+    class ReadingReadmeAnalyzer(FakeReadmeAnalyzer):
+        async def analyze_readme(self, content):
+            await super().analyze_readme(content)
+            return {"main_purpose": content}
+
+    repo = make_repo(tmp_path)
+    provider = FakeProvider()
+    readme_analyzer = ReadingReadmeAnalyzer()
+    relevance_watcher = RelevanceWatcher(
+        str(repo), {"watchDebounceMs": 0}, provider, readme_analyzer
+    )
+    await relevance_watcher.initialize()
+    provider.calls.clear()
+
+    (repo / "README.md").write_text("new readme")
+    relevance_watcher.notify({"README.md"})
+    await asyncio.sleep(0.05)
+    assert readme_analyzer.analyses == 2
+    assert sorted(provider.calls) == ["README.md", "src/junk.py", "src/main.py"]
+
+@pytest.mark.asyncio
+async def test_initial_pass_is_concurrent_and_reuses_cached_verdicts(tmp_path):
+    class SlowProvider(FakeProvider):
+        in_flight = 0
+        peak = 0
+
+        async def evaluate_file_relevance(self, file_path, file_preview, project_context):
+            SlowProvider.in_flight += 1
+            SlowProvider.peak = max(SlowProvider.peak, SlowProvider.in_flight)
+            await asyncio.sleep(0.01)
+            SlowProvider.in_flight -= 1
+            return await super().evaluate_file_relevance(file_path, file_preview, project_context)
+
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    make_repo(repo)
+    config = {"maxConcurrency": 2, "cachePath": str(tmp_path / "cache.json")}
+    first = RelevanceWatcher(str(repo), config, SlowProvider(), FakeReadmeAnalyzer())
+    await first.initialize()
+    assert SlowProvider.peak == 2
+
+    provider = FakeProvider()
+    readme_analyzer = FakeReadmeAnalyzer()
+    warm = RelevanceWatcher(str(repo), config, provider, readme_analyzer)
+    await warm.initialize()
+    assert provider.calls == []
+    assert readme_analyzer.analyses == 0
+    assert warm.relevant_files() == first.relevant_files() == ["src/main.py"]
+
+def test_polling_watcher_detects_changes(tmp_path):
+    repo = make_repo(tmp_path)
+    watcher = PollingWatcher(repo, get_default_ignore_patterns())
+    assert watcher.poll() == set()
+
+    (repo / "src" / "main.py").write_text("keep this longer")
+    (repo / "src" / "new.py").write_text("new")
+    (repo / "src" / "junk.py").unlink()
+    (repo / "node_modules" / "other.js").write_text("ignored")
+    assert watcher.poll() == {"src/main.py", "src/new.py", "src/junk.py"}
+
+def test_inotify_watcher_reports_nested_changes(tmp_path):
+    repo = make_repo(tmp_path)
+    try:
+        watcher = InotifyWatcher(repo, get_default_ignore_patterns())
+    except OSError:
+        pytest.skip("inotify not available")
+    try:
+        (repo / "src" / "main.py").write_text("changed")
+        (repo / "pkg").mkdir()
+        (repo / "pkg" / "mod.py").write_text("new")
+        (repo / "node_modules" / "other.js").write_text("ignored")
+        changed = watcher.read_events()
+        (repo / "pkg" / "later.py").write_text("later")
+        changed |= watcher.read_events()
+    finally:
+        watcher.close()
+    assert changed == {"src/main.py", "pkg/mod.py", "pkg/later.py"}
+
+@pytest.mark.asyncio
+async def test_unavailable_api_falls_back_to_heuristics(tmp_path):
+    from providers.circuit_breaker import CircuitOpenError
+
+    class FailingProvider(FakeProvider):
+        async def evaluate_file_relevance(self, file_path, file_preview, project_context):
+            if file_path == "src/main.py":
+                raise CircuitOpenError("open")
+            if file_path == "src/junk.py":
+                return FileRelevance(path=file_path, is_relevant=True, confidence=0.0, reason="failed", error="503")
+            return await super().evaluate_file_relevance(file_path, file_preview, project_context)
+
+    repo = make_repo(tmp_path)
+    relevance_watcher = RelevanceWatcher(str(repo), {}, FailingProvider(), FakeReadmeAnalyzer())
+    await relevance_watcher.initialize()
+
+    assert relevance_watcher.verdicts["src/main.py"].reason.startswith("Heuristic")
+    assert relevance_watcher.verdicts["src/junk.py"].confidence > 0
+    assert relevance_watcher.snapshot()["statistics"]["degraded_files"] == 2
@@ -0,0 +1,469 @@
+#watcher.py
+import asyncio
+import ctypes
+import ctypes.util
+import json
+import os
+import struct
+import sys
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Set
+from pathlib import Path
+import argparse
+import logging
+import time
+
+from analyze import configure_logging, collect_repository_files, get_default_ignore_patterns, should_ignore_file
+from cache import VerdictCache, context_key, default_cache_path
+from heuristics import classify_file
+from providers.base import FileRelevance
+from providers.circuit_breaker import CircuitBreaker, CircuitOpenError
+from providers.client_pool import ClientPool
+from providers.openai_provider import FILE_EVALUATION_MODEL, OpenAIProvider, read_file_safely
+from providers.readme_analyzer import ReadmeAnalyzer
+
+logger = logging.getLogger("Watcher")
+
+# inotify event masks (see inotify(7))
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+README_NAMES = {
+    'README.md',
+    'README.MD',
+    'Readme.md',
+    'readme.md',
+    'README.markdown',
+    'README'
+}
+
+class PollingWatcher:
+    """Detect changed files by periodically comparing mtime/size snapshots."""
+
+    def __init__(self, repo_path: Path, ignore_patterns: Set[str], interval: float = 1.0):
+        self.repo_path = repo_path
+        self.ignore_patterns = ignore_patterns
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[str, tuple]:
+        snapshot = {}
+        for relative_path in collect_repository_files(self.repo_path, self.ignore_patterns):
+            try:
+                stat = (self.repo_path / relative_path).stat()
+            except OSError:
+                continue
+            snapshot[relative_path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self) -> Set[str]:
+        """Rescan the tree and return paths added, removed or modified since the last poll."""
+        current = self._scan()
+        changed = {
+            path for path, signature in current.items()
+            if self._snapshot.get(path) != signature
+        }
+        changed.update(set(self._snapshot) - set(current))
+        self._snapshot = current
+        return changed
+
+    async def changes(self) -> AsyncIterator[Set[str]]:
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.interval)
+            changed = await loop.run_in_executor(None, self.poll)
+            if changed:
+                yield changed
+
+    def close(self) -> None:
+        pass
+
+class InotifyWatcher:
+    """Detect changed files with Linux inotify, watching every directory recursively."""
+
+    def __init__(self, repo_path: Path, ignore_patterns: Set[str]):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("libc not found")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("libc does not provide inotify")
+
+        self.repo_path = repo_path
+        self.ignore_patterns = ignore_patterns
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_init1 failed: {os.strerror(errno)}")
+        self._watches: Dict[int, Path] = {}
+        try:
+            self._add_tree(repo_path)
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, directory: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(directory)), WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, f"inotify_add_watch failed for {directory}: {os.strerror(errno)}")
+        self._watches[wd] = directory
+
+    def _add_tree(self, root: Path) -> Set[str]:
+        """Watch root and all non-ignored subdirectories, returning files found under them."""
+        found = set()
+        for dirpath, dirnames, filenames in os.walk(root):
+            current = Path(dirpath)
+            relative_dir = current.relative_to(self.repo_path)
+            if str(relative_dir) != "." and should_ignore_file(str(relative_dir), self.ignore_patterns):
+                dirnames[:] = []
+                continue
+            self._add_watch(current)
+            for filename in filenames:
+                relative_path = str(relative_dir / filename) if str(relative_dir) != "." else filename
+                if not should_ignore_file(relative_path, self.ignore_patterns):
+                    found.add(relative_path)
+        return found
+
+    def read_events(self) -> Set[str]:
+        """Drain pending inotify events and return the affected repository-relative paths."""
+        changed = set()
+        while True:
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not buffer:
+                break
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, _cookie, length = EVENT_HEADER.unpack_from(buffer, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(buffer[offset:offset + length].rstrip(b"\0"))
+                offset += length
+
+                if mask & IN_Q_OVERFLOW:
+                    logger.warning("inotify queue overflowed, rescanning repository")
+                    changed.update(collect_repository_files(self.repo_path, self.ignore_patterns))
+                    continue
+                if mask & IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    continue
+
+                directory = self._watches.get(wd)
+                if directory is None or not name:
+                    continue
+                full_path = directory / name
+                relative_path = str(full_path.relative_to(self.repo_path))
+                if should_ignore_file(relative_path, self.ignore_patterns):
+                    continue
+
+                if mask & IN_ISDIR:
+                    if mask & (IN_CREATE | IN_MOVED_TO) and full_path.is_dir():
+                        # Files may land in a new directory before its watch exists
+                        changed.update(self._add_tree(full_path))
+                    elif mask & (IN_DELETE | IN_MOVED_FROM):
+                        # Reported as the directory itself; consumers drop everything below it
+                        changed.add(relative_path)
+                    continue
+                changed.add(relative_path)
+        return changed
+
+    async def changes(self) -> AsyncIterator[Set[str]]:
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        loop.add_reader(self._fd, ready.set)
+        try:
+            while True:
+                await ready.wait()
+                ready.clear()
+                changed = self.read_events()
+                if changed:
+                    yield changed
+        finally:
+            loop.remove_reader(self._fd)
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+def create_watcher(repo_path: Path, ignore_patterns: Set[str], config: Dict):
+    """Create an inotify watcher, falling back to polling where inotify is unavailable."""
+    backend = config.get("watchBackend", "auto")
+    if backend in ("auto", "inotify"):
+        try:
+            watcher = InotifyWatcher(repo_path, ignore_patterns)
+            logger.info("Watching repository with inotify")
+            return watcher
+        except OSError as e:
+            if backend == "inotify":
+                raise
+            logger.warning(f"inotify unavailable ({str(e)}), falling back to polling")
+    interval = config.get("watchPollInterval", 1.0)
+    logger.info(f"Watching repository by polling every {interval}s")
+    return PollingWatcher(repo_path, ignore_patterns, interval)
+
+class RelevanceWatcher:
+    """Keep relevance verdicts for a repository warm, re-evaluating only changed files."""
+
+    def __init__(
+        self,
+        repo_path: str,
+        config: Dict,
+        ai_provider: OpenAIProvider,
+        readme_analyzer: ReadmeAnalyzer
+    ):
+        self.repo_path = Path(repo_path)
+        self.config = config
+        self.ai_provider = ai_provider
+        self.readme_analyzer = readme_analyzer
+        self.threshold = config.get("relevanceThreshold", 0.7)
+        self.debounce = config.get("watchDebounceMs", 300) / 1000
+        self.max_delay = config.get("watchMaxDelayMs", 2000) / 1000
+        self.concurrency = config.get("maxConcurrency", 8)
+        self.ignore_patterns = get_default_ignore_patterns()
+        # Shared with analyze.py, so a watcher starts from the verdicts of earlier runs
+        self.cache = VerdictCache(
+            (config.get("cachePath") or default_cache_path(repo_path))
+            if config.get("cache", True) else None
+        )
+
+        self.project_context: Dict = {}
+        self.verdict_contexts: Set[str] = set()
+        self.verdicts: Dict[str, FileRelevance] = {}
+        # Paths whose current verdict is heuristic because the API was unavailable
+        self.degraded: Set[str] = set()
+        self.pending: Set[str] = set()
+        self.reevaluations = 0
+        self._first_pending_at: Optional[float] = None
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    async def initialize(self) -> None:
+        """Analyze the README and evaluate every file once.
+
+        The README analysis and file verdicts are taken from the verdict cache
+        where possible; the remaining files are evaluated maxConcurrency at a time.
+        """
+        async with self._lock:
+            await self._refresh_project_context()
+            all_files = collect_repository_files(self.repo_path, self.ignore_patterns)
+            logger.info(f"Initial evaluation of {len(all_files)} files")
+            await self._evaluate_all(all_files)
+            self.cache.save()
+
+    async def _refresh_project_context(self) -> None:
+        readme_content = self.readme_analyzer.load_readme(str(self.repo_path))
+        cached_context = self.cache.get_readme(readme_content) if readme_content else None
+        if not readme_content:
+            logger.error("No README file found in repository")
+            self.project_context = {}
+        elif cached_context is not None:
+            logger.info("Using cached README analysis")
+            self.project_context = cached_context
+        else:
+            errors_before = self.readme_analyzer.errors_encountered
+            self.project_context = await self.readme_analyzer.analyze_readme(readme_content)
+            if self.readme_analyzer.errors_encountered == errors_before:
+                self.cache.put_readme(readme_content, self.project_context)
+        self.verdict_contexts = {
+            context_key(self.project_context, model) for model in self.ai_provider.evaluation_models()
+        }
+
+    async def _evaluate_all(self, paths: Iterable[str]) -> None:
+        remaining = iter(paths)
+
+        async def worker() -> None:
+            for relative_path in remaining:
+                await self._evaluate(relative_path)
+
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+    async def _evaluate(self, relative_path: str) -> None:
+        full_path = self.repo_path / relative_path
+        if not full_path.is_file():
+            if self.verdicts.pop(relative_path, None) is not None:
+                logger.info(f"File removed: {relative_path}")
+            self.degraded.discard(relative_path)
+            return
+        try:
+            preview = await asyncio.get_running_loop().run_in_executor(
+                None,
+                read_file_safely,
+                str(full_path),
+                self.config.get("maxPreviewLines", 50)
+            )
+            verdict = self.cache.get(relative_path, preview, self.verdict_contexts) if preview is not None else None
+            if verdict is not None:
+                self.degraded.discard(relative_path)
+                self.verdicts[relative_path] = verdict
+                return
+            try:
+                verdict = await self.ai_provider.evaluate_file_relevance(
+                    relative_path,
+                    preview,
+                    self.project_context
+                )
+            except CircuitOpenError:
+                verdict = None
+            if verdict is None or verdict.error:
+                # Decided locally rather than kept as a failed verdict
+                verdict = classify_file(relative_path, preview, self.project_context)
+                self.degraded.add(relative_path)
+            else:
+                self.degraded.discard(relative_path)
+                if preview is not None:
+                    model = verdict.model or FILE_EVALUATION_MODEL
+                    self.cache.put(relative_path, preview, context_key(self.project_context, model), verdict)
+            self.verdicts[relative_path] = verdict
+        except Exception as e:
+            logger.error(f"Error processing {relative_path}: {str(e)}", exc_info=True)
+
+    def notify(self, changed: Set[str]) -> None:
+        """Queue changed paths; they are evaluated once changes settle for the debounce period."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        self.pending.update(changed)
+        if self._first_pending_at is None:
+            self._first_pending_at = now
+        if self._timer is not None:
+            self._timer.cancel()
+        # Never postpone a burst of changes past max_delay from its first event
+        delay = min(self.debounce, max(0.0, self._first_pending_at + self.max_delay - now))
+        self._timer = loop.call_later(delay, self._schedule_flush)
+
+    def _schedule_flush(self) -> None:
+        self._timer = None
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.ensure_future(self.flush())
+
+    async def flush(self) -> None:
+        """Re-evaluate all pending paths, picking up changes that arrive meanwhile."""
+        async with self._lock:
+            while self.pending:
+                batch = self.pending
+                self.pending = set()
+                self._first_pending_at = None
+                logger.info(f"Re-evaluating {len(batch)} changed files")
+
+                removed_dirs = [
+                    path for path in batch
+                    if not (self.repo_path / path).is_file() and path not in self.verdicts
+                ]
+                for directory in removed_dirs:
+                    prefix = directory + os.sep
+                    batch = batch | {path for path in self.verdicts if path.startswith(prefix)}
+
+                if batch & README_NAMES:
+                    # A new README changes the context every verdict was made against
+                    await self._refresh_project_context()
+                    batch = batch | set(self.verdicts)
+
+                await self._evaluate_all(sorted(batch))
+                self.reevaluations += len(batch)
+                self.cache.save()
+
+    def relevant_files(self) -> List[str]:
+        return sorted(
+            path for path, verdict in self.verdicts.items()
+            if verdict.is_relevant and verdict.confidence >= self.threshold
+        )
+
+    def snapshot(self) -> Dict:
+        """Return the current results in the same shape analyze.py prints."""
+        relevant_files = self.relevant_files()
+        return {
+            "relevantFiles": relevant_files,
+            "projectContext": self.project_context,
+            "statistics": {
+                "total_files": len(self.verdicts),
+                "relevant_files": len(relevant_files),
+                "pending_files": len(self.pending),
+                "degraded_files": len(self.degraded),
+                "reevaluations": self.reevaluations
+            }
+        }
+
+    async def run(self, watcher) -> None:
+        """Feed change notifications from a watcher until cancelled."""
+        try:
+            async for changed in watcher.changes():
+                self.notify(changed)
+        finally:
+            watcher.close()
+
+async def serve_requests(relevance_watcher: RelevanceWatcher) -> None:
+    """Answer line-based requests on stdin with the in-memory results on stdout.
+
+    Any line other than "quit" returns the current results as one line of JSON.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        if not line or line.strip() == "quit":
+            return
+        print(json.dumps(relevance_watcher.snapshot()), flush=True)
+
+async def main():
+    configure_logging()
+    try:
+        parser = argparse.ArgumentParser()
+        parser.add_argument("repo_path", help="Path to repository")
+        parser.add_argument("--config", help="Repopack configuration")
+        args = parser.parse_args()
+
+        config = json.loads(args.config) if args.config else {}
+
+        api_key = os.getenv("OPENAI_API_KEY")
+        client = ClientPool.from_config(config, api_key)
+
+        start_time = time.time()
+        relevance_watcher = RelevanceWatcher(
+            args.repo_path,
+            config,
+            OpenAIProvider(
+                api_key,
+                client=client,
+                circuit_breaker=CircuitBreaker.from_config(config) if config.get("circuitBreaker", True) else None
+            ),
+            ReadmeAnalyzer(client)
+        )
+        # Start watching before the initial pass so edits made during it are not lost
+        watcher = create_watcher(relevance_watcher.repo_path, relevance_watcher.ignore_patterns, config)
+        watch_task = asyncio.ensure_future(relevance_watcher.run(watcher))
+        await relevance_watcher.initialize()
+        logger.info(f"Initial analysis complete in {time.time() - start_time:.2f}s, serving requests")
+        print(json.dumps(relevance_watcher.snapshot()), flush=True)
+
+        await serve_requests(relevance_watcher)
+        watch_task.cancel()
+
+    except Exception as e:
+        logger.error(f"Fatal error: {str(e)}", exc_info=True)
+        print(json.dumps({
+            "error": str(e),
+            "relevantFiles": [],
+            "projectContext": {}
+        }))
+        sys.exit(1)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -3,7 +3,7 @@ import { spawn, type ChildProcess } from 'node:child_process';
 import path from 'node:path';
 import { fileURLToPath } from 'url';
 import * as dotenv from 'dotenv';
-import type { RepopackConfigMerged } from '../config/configTypes.js';
+import type { AIConfig, RepopackConfigMerged } from '../config/configTypes.js';
 import { logger } from '../shared/logger.js';
 import { RepopackError } from '../shared/errorHandle.js';
 
@@ -42,8 +42,14 @@ export class AIBridge {
     }
   }
 
-  private checkEnvironment(): void {
+  private checkEnvironment(aiConfig?: AIConfig): void {
     logger.debug('Checking environment...');
+
+    // A key pool is validated by the Python side, which knows every source
+    if (process.env.OPENAI_API_KEYS || aiConfig?.apiEndpoints?.length) {
+      return;
+    }
+
     logger.debug(`Environment file path: ${envPath}`);
     logger.debug(`API Key status: ${process.env.OPENAI_API_KEY ? 'Present' : 'Missing'}`);
     
@@ -88,7 +94,7 @@ export class AIBridge {
     const startTime = Date.now();
     
     try {
-      this.checkEnvironment();
+      this.checkEnvironment(config.ai);
       await this.validatePythonSetup();
 
       logger.debug('Starting AI analysis...');
@@ -113,7 +119,15 @@ export class AIBridge {
             ...config,
             relevanceThreshold: config.ai?.relevanceThreshold ?? 0.7,
             maxTokens: config.ai?.maxTokens ?? 4000,
-            modelName: config.ai?.modelName ?? 'gpt-4o'
+            modelName: config.ai?.modelName ?? 'gpt-4o',
+            deadlineSeconds: config.ai?.deadlineSeconds,
+            maxPreviewLines: config.ai?.maxPreviewLines ?? 50,
+            adaptivePreview: config.ai?.adaptivePreview ?? false,
+            circuitBreaker: config.ai?.circuitBreaker ?? true,
+            query: config.ai?.query,
+            queryTopK: config.ai?.queryTopK,
+            importGraph: config.ai?.importGraph ?? false,
+            apiEndpoints: config.ai?.apiEndpoints
           })
         ], {
           env: {
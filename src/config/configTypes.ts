@@ -6,6 +6,24 @@ export interface AIConfig {
   relevanceThreshold: number;
   maxTokens?: number;
   modelName?: string;
+  deadlineSeconds?: number;
+  maxPreviewLines?: number;
+  adaptivePreview?: boolean;
+  circuitBreaker?: boolean;
+  query?: string;
+  queryTopK?: number;
+  importGraph?: boolean;
+  apiEndpoints?: AIEndpointConfig[];
+}
+
+// An API key or OpenAI-compatible endpoint in the analysis key pool
+export interface AIEndpointConfig {
+  name?: string;
+  apiKeyEnv?: string;
+  baseUrl?: string;
+  model?: string;
+  maxConcurrency?: number;
+  requestsPerMinute?: number;
 }
 
 // Base configuration interface with all optional fields